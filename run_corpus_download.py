@@ -1,5 +1,7 @@
+import argparse
 import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import date
 
 # 設定
@@ -7,36 +9,57 @@ START_YEAR = 2018
 END_YEAR = 2018
 DOC_TYPES = ["annual"]
 
-def main():
-    for year in range(START_YEAR, END_YEAR + 1):
-        for doc_type in DOC_TYPES:
-            for month in range(1, 13):
-                # 開始日と終了日を生成
-                start_date = f"{year}-{month:02d}-01"
-                
-                if month == 12:
-                    end_date = f"{year + 1}-01-01"
-                else:
-                    end_date = f"{year}-{month + 1:02d}-01"
-
-                print(f"Processing: doc_type={doc_type}, start_date={start_date}, end_date={end_date}")
-
-                # 実行コマンド (pythonコマンドを直接使用)
-                cmd = [
-                    "python",
-                    "scripts/prepare_edinet_corpus.py",
-                    "--doc_type", doc_type,
-                    "--start_date", start_date,
-                    "--end_date", end_date
-                ]
-
-                try:
-                    subprocess.run(cmd, check=True)
-                except subprocess.CalledProcessError as e:
-                    print(f"Error executing command: {e}")
-                except KeyboardInterrupt:
-                    print("Aborted by user.")
-                    return
+def run_month(doc_type, year, month):
+    # 開始日と終了日を生成
+    start_date = f"{year}-{month:02d}-01"
+
+    if month == 12:
+        end_date = f"{year + 1}-01-01"
+    else:
+        end_date = f"{year}-{month + 1:02d}-01"
+
+    print(f"Processing: doc_type={doc_type}, start_date={start_date}, end_date={end_date}")
+
+    # 実行コマンド (pythonコマンドを直接使用)
+    cmd = [
+        "python",
+        "scripts/prepare_edinet_corpus.py",
+        "--doc_type", doc_type,
+        "--start_date", start_date,
+        "--end_date", end_date
+    ]
+    subprocess.run(cmd, check=True)
+
+def main(max_parallel=4):
+    jobs = [
+        (doc_type, year, month)
+        for year in range(START_YEAR, END_YEAR + 1)
+        for doc_type in DOC_TYPES
+        for month in range(1, 13)
+    ]
+
+    # 月ごとの処理はネットワーク待ちが中心なので、複数月を同時に走らせる
+    executor = ThreadPoolExecutor(max_workers=max_parallel)
+    try:
+        futures = [executor.submit(run_month, *job) for job in jobs]
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except subprocess.CalledProcessError as e:
+                print(f"Error executing command: {e}")
+    except KeyboardInterrupt:
+        print("Aborted by user.")
+        executor.shutdown(wait=False, cancel_futures=True)
+        return
+    executor.shutdown()
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--max_parallel",
+        type=int,
+        default=4,
+        help="Number of months to download concurrently",
+    )
+    args = parser.parse_args()
+    main(args.max_parallel)
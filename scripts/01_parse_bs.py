@@ -1,18 +1,24 @@
 import sys
+import json
 import subprocess
-import ast
 from pathlib import Path
 import pandas as pd
 
-def main():
-    base = Path("data")
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
 
-    # E04707優先でTSVを探す
-    candidates = []
-    if (base / "E04707").exists():
-        candidates = list((base / "E04707").glob("*.tsv"))
-    if not candidates:
-        candidates = list(base.rglob("*.tsv"))
+try:
+    from _parse_common import JSON_SENTINEL, PERIOD_ORD, find_tsvs
+except ImportError:
+    # scripts/ 以外から読み込まれたとき用
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    from _parse_common import JSON_SENTINEL, PERIOD_ORD, find_tsvs
+
+def main():
+    candidates = find_tsvs(Path("data"))
     if not candidates:
         raise SystemExit("TSVが見つかりません。先に downloader で取得できているか確認してください。")
 
@@ -22,8 +28,8 @@ def main():
     py = sys.executable
 
     cmds = [
-        [py, "-m", "edinet2dataset.parser", "--file_path", str(tsv), "--category_list", "BS"],
-        [py, "src/edinet2dataset/parser.py", "--file_path", str(tsv), "--category_list", "BS"],
+        [py, "-m", "edinet2dataset.parser", "--file_path", str(tsv), "--category_list", "BS", "--emit", "json"],
+        [py, "src/edinet2dataset/parser.py", "--file_path", str(tsv), "--category_list", "BS", "--emit", "json"],
     ]
 
     out = None
@@ -38,20 +44,26 @@ def main():
     if out is None:
         raise SystemExit(f"parserの起動に失敗しました: {last_err}")
 
-    # 出力から辞書っぽい行を拾う（ログは無視）
-    lines = [l.strip() for l in out.splitlines() if l.strip().startswith("{") and l.strip().endswith("}")]
-    if not lines:
+    # センチネル付きのJSON行だけを拾う（ログは無視）
+    d = None
+    for line in out.splitlines():
+        if line.startswith(JSON_SENTINEL):
+            d = _loads(line[len(JSON_SENTINEL):])["BS"]
+            break
+    if d is None:
         raise SystemExit("parser出力から辞書データを抽出できませんでした（出力形式が想定と違う可能性）。")
 
-    d = ast.literal_eval(lines[-1])
-
-    rows = []
-    for item, periods in d.items():
-        for period, val in periods.items():
-            rows.append({"doc_id": tsv.stem, "statement": "BS", "item": item, "period": period, "value": val})
+    # 行ごとの dict を作らず、列ごとのリストから一度に DataFrame を作る
+    items, periods, vals = [], [], []
+    for item, per_dict in d.items():
+        items.extend([item] * len(per_dict))
+        periods.extend(per_dict.keys())
+        vals.extend(per_dict.values())
 
-    df = pd.DataFrame(rows)
+    df = pd.DataFrame({"doc_id": tsv.stem, "statement": "BS", "item": items, "period": periods, "value": vals})
     df["value_num"] = pd.to_numeric(df["value"], errors="coerce")
+    df["period_ord"] = df["period"].map(PERIOD_ORD).fillna(9).astype("uint8")
+    df["doc_id"] = df["doc_id"].astype("category")  # 全行同じ値なので辞書エンコードで持つ
 
     outdir = Path("work/olc/parsed")
     outdir.mkdir(parents=True, exist_ok=True)
@@ -1,6 +1,7 @@
 import duckdb
 
 con = duckdb.connect("work/olc/olc.duckdb")
+con.execute("PRAGMA enable_object_cache")  # parquet のメタデータをキャッシュ
 
 con.execute("CREATE OR REPLACE TABLE bs AS SELECT * FROM read_parquet('work/olc/parsed/bs.parquet')")
 con.execute("CREATE OR REPLACE TABLE pl AS SELECT * FROM read_parquet('work/olc/parsed/pl.parquet')")
@@ -1,5 +1,6 @@
 import duckdb
 con = duckdb.connect("work/olc/olc.duckdb")
+con.execute("PRAGMA enable_object_cache")  # parquet のメタデータをキャッシュ
 
 # bs は既にある前提。pl を追加
 con.execute("""
@@ -1,50 +1,70 @@
+import os
 import duckdb
 
-con = duckdb.connect("work/olc/olc.duckdb")
+def main(con, export_csv=False):
+    # BSとPLを結合して「材料（facts）」を作る
+    con.execute("""
+    CREATE OR REPLACE VIEW facts AS
+    SELECT doc_id, period, period_ord, item, value_num FROM bs
+    UNION ALL
+    SELECT doc_id, period, period_ord, item, value_num FROM pl
+    """)
 
-# BSとPLを結合して「材料（facts）」を作る
-con.execute("""
-CREATE OR REPLACE VIEW facts AS
-SELECT doc_id, period, item, value_num FROM bs
-UNION ALL
-SELECT doc_id, period, item, value_num FROM pl
-""")
+    # 会社×期間の成績表（1行にまとめる）
+    # 5科目だけに絞ってから PIVOT（1回の集約で横持ちにする）
+    con.execute("""
+    CREATE OR REPLACE TABLE mart_fin AS
+    SELECT
+      doc_id,
+      period,
+      period_ord,
+      "売上高"   AS sales,
+      "営業利益" AS op_profit,
+      "当期利益" AS net_income,
+      "総資産"   AS total_assets,
+      "純資産"   AS equity
+    FROM (
+      PIVOT (
+        SELECT doc_id, period, period_ord, item, value_num FROM facts
+        WHERE item IN ('売上高','営業利益','当期利益','総資産','純資産')
+      )
+      ON item IN ('売上高','営業利益','当期利益','総資産','純資産')
+      USING MAX(value_num)
+      GROUP BY doc_id, period, period_ord
+    )
+    """)
 
-# 会社×期間の成績表（1行にまとめる）
-con.execute("""
-CREATE OR REPLACE TABLE mart_fin AS
-SELECT
-  doc_id,
-  period,
-  MAX(CASE WHEN item='売上高'   THEN value_num END) AS sales,
-  MAX(CASE WHEN item='営業利益' THEN value_num END) AS op_profit,
-  MAX(CASE WHEN item='当期利益' THEN value_num END) AS net_income,
-  MAX(CASE WHEN item='総資産'   THEN value_num END) AS total_assets,
-  MAX(CASE WHEN item='純資産'   THEN value_num END) AS equity
-FROM facts
-GROUP BY doc_id, period
-""")
+    df = con.execute("""
+    SELECT
+      period,
+      sales,
+      op_profit,
+      net_income,
+      total_assets,
+      equity,
+      -- 比率は単精度で十分（金額は円単位の精度が要るので DOUBLE のまま）
+      CAST(op_profit / NULLIF(sales, 0) AS REAL)        AS op_margin,
+      CAST(net_income / NULLIF(total_assets,0) AS REAL) AS roa,
+      CAST(equity / NULLIF(total_assets,0) AS REAL)     AS equity_ratio
+    FROM mart_fin
+    ORDER BY period_ord
+    """).df()
 
-df = con.execute("""
-SELECT
-  period,
-  sales,
-  op_profit,
-  net_income,
-  total_assets,
-  equity,
-  op_profit / NULLIF(sales, 0)        AS op_margin,
-  net_income / NULLIF(total_assets,0) AS roa,
-  equity / NULLIF(total_assets,0)     AS equity_ratio
-FROM mart_fin
-ORDER BY CASE period
-  WHEN 'Prior2Year' THEN 1
-  WHEN 'Prior1Year' THEN 2
-  WHEN 'CurrentYear' THEN 3
-  ELSE 9 END
-""").df()
+    print(df)
 
-print(df)
+    # 後続（08）は parquet を読む。CSV は目視確認用に必要なときだけ出す
+    df.to_parquet("work/olc/mart_fin.parquet", engine="pyarrow", compression="zstd", index=False)
+    print("\nSaved: work/olc/mart_fin.parquet")
+    if export_csv:
+        df.to_csv("work/olc/mart_fin.csv", index=False, encoding="utf-8-sig")
+        print("Saved: work/olc/mart_fin.csv")
 
-df.to_csv("work/olc/mart_fin.csv", index=False, encoding="utf-8-sig")
-print("\nSaved: work/olc/mart_fin.csv")
+if __name__ == "__main__":
+    import argparse
+    p = argparse.ArgumentParser()
+    p.add_argument("--export_csv", action="store_true", help="目視確認用に CSV も出力する")
+    args = p.parse_args()
+
+    con = duckdb.connect("work/olc/olc.duckdb")
+    con.execute(f"PRAGMA threads={os.cpu_count()}")
+    main(con, args.export_csv)
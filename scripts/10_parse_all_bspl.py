@@ -1,60 +1,118 @@
-import sys
-import subprocess
-import ast
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-import pandas as pd
-
-def parse_one(tsv_path: Path, category: str):
-    py = sys.executable
-    cmds = [
-        [py, "-m", "edinet2dataset.parser", "--file_path", str(tsv_path), "--category_list", category],
-        [py, "src/edinet2dataset/parser.py", "--file_path", str(tsv_path), "--category_list", category],
-    ]
-    out = None
-    last_err = None
-    for cmd in cmds:
-        try:
-            out = subprocess.check_output(cmd, text=True)  # ★encoding指定しない（文字化け防止）
-            break
-        except Exception as e:
-            last_err = e
-    if out is None:
-        raise RuntimeError(f"parser failed: {last_err}")
-
-    lines = [l.strip() for l in out.splitlines() if l.strip().startswith("{") and l.strip().endswith("}")]
-    if not lines:
-        raise RuntimeError("parser output did not contain dict-like line")
-    d = ast.literal_eval(lines[-1])
-
-    rows = []
-    for item, periods in d.items():
-        for period, val in periods.items():
-            rows.append({
-                "doc_id": tsv_path.stem,
-                "statement": category,
-                "item": item,
-                "period": period,
-                "value": val,
-            })
-
-    df = pd.DataFrame(rows)
-    df["value_num"] = pd.to_numeric(df["value"], errors="coerce")
-    return df
-
-def main():
-    tsvs = sorted(Path("data/E04707").glob("*.tsv"))
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+from edinet2dataset.parser import parse_tsv
+
+CATEGORIES = ["BS", "PL"]
+PERIOD_ORD = {"Prior2Year": 1, "Prior1Year": 2, "CurrentYear": 3}  # 並び順用（それ以外は 9）
+
+# 繰り返しの多い列は辞書型で持つ（parquet も辞書エンコードで書かれる）
+SCHEMA = pa.schema([
+    ("doc_id", pa.dictionary(pa.int32(), pa.string())),
+    ("statement", pa.dictionary(pa.int8(), pa.string())),
+    ("item", pa.dictionary(pa.int32(), pa.string())),
+    ("period", pa.dictionary(pa.int8(), pa.string())),
+    ("value", pa.string()),
+    ("value_num", pa.float64()),
+    ("period_ord", pa.uint8()),
+])
+
+def to_number(val):
+    try:
+        return float(val)
+    except (TypeError, ValueError):
+        return None
+
+def to_table(d: dict, doc_id: str, category: str) -> pa.Table:
+    # 列ごとのリストから pandas を経由せずに Arrow Table を作る
+    items, periods, vals = [], [], []
+    for item, per_dict in d.items():
+        items.extend([item] * len(per_dict))
+        periods.extend(per_dict.keys())
+        vals.extend(per_dict.values())
+
+    n = len(items)
+    return pa.table({
+        "doc_id": [doc_id] * n,
+        "statement": [category] * n,
+        "item": items,
+        "period": periods,
+        "value": [None if v is None else str(v) for v in vals],
+        "value_num": [to_number(v) for v in vals],
+        "period_ord": [PERIOD_ORD.get(p, 9) for p in periods],
+    }, schema=SCHEMA)
+
+def parse_one(tsv_path: Path):
+    # parser を同一プロセスで呼ぶ（1回のパースで BS/PL 両方が取れる）
+    data = parse_tsv(tsv_path, CATEGORIES)
+    if data is None:
+        return None  # 連結なし。1件のために全体を止めない（呼び出し側でスキップして報告）
+    return {cat: to_table(getattr(data, cat.lower()), tsv_path.stem, cat) for cat in CATEGORIES}
+
+def list_tsvs(tsv_dir: Path) -> list:
+    # scandir はエントリごとの stat を省ける
+    if not tsv_dir.exists():
+        return []
+    with os.scandir(tsv_dir) as it:
+        return sorted(Path(e.path) for e in it if e.name.endswith(".tsv") and e.is_file())
+
+def main(max_workers: int = None):
+    tsvs = list_tsvs(Path("data/E04707"))
     if not tsvs:
         raise SystemExit("data/E04707 にTSVがありません。先にダウンロードしてください。")
 
-    outdir = Path("work/olc/parsed")
+    # statement=BS / statement=PL の hive パーティションで1つのデータセットにまとめる
+    outdir = Path("work/olc/parsed/bspl")
     outdir.mkdir(parents=True, exist_ok=True)
 
-    for tsv in tsvs:
-        for cat in ["BS", "PL"]:
-            df = parse_one(tsv, cat)
-            outpath = outdir / f"{cat.lower()}_{tsv.stem}.parquet"
-            df.to_parquet(outpath, index=False)
-            print("Saved:", outpath, "rows=", len(df))
+    # TSVごとに独立なのでプロセス並列（polars のスレッドと fork の相性を避けて spawn）
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count(), mp_context=ctx) as ex:
+        results = list(ex.map(parse_one, tsvs))
+
+    skipped = [p.stem for p, tables in zip(tsvs, results) if tables is None]
+    if skipped:
+        print("WARNING: parser がデータを返さなかった（連結なし?）TSVをスキップしました:", skipped)
+    results = [tables for tables in results if tables is not None]
+    if not results:
+        raise SystemExit("パースできたTSVがありません。")
+
+    table = pa.concat_tables([tables[cat] for tables in results for cat in CATEGORIES])
+    # item 順に並べて row group ごとの min/max を狭くし、読み込み時に row group を読み飛ばせるようにする
+    # （辞書型のままでは並べ替えられないので文字列にしたキーで順序だけ求める）
+    sort_keys = ["statement", "item", "period"]
+    order = pc.sort_indices(
+        pa.table({c: table[c].cast(pa.string()) for c in sort_keys}),
+        sort_keys=[(c, "ascending") for c in sort_keys],
+    )
+    table = table.take(order)
+    ds.write_dataset(
+        table,
+        outdir,
+        format="parquet",
+        partitioning=["statement"],
+        partitioning_flavor="hive",
+        existing_data_behavior="delete_matching",
+        file_options=ds.ParquetFileFormat().make_write_options(
+            compression="zstd",
+            # item = '総資産' のような等値検索用（科目名の種類は数千程度）
+            bloom_filter_options={"item": {"ndv": 4096, "fpp": 0.05}},
+        ),
+        max_rows_per_file=1_000_000,
+        max_rows_per_group=64_000,
+    )
+    print("Saved:", outdir, "docs=", len(results), "rows=", table.num_rows)
+    for cat in CATEGORIES:
+        print(cat, "rows=", sum(tables[cat].num_rows for tables in results))
 
 if __name__ == "__main__":
-    main()
+    import argparse
+    p = argparse.ArgumentParser()
+    p.add_argument("--max_workers", type=int, default=None)
+    args = p.parse_args()
+    main(args.max_workers)
@@ -1,19 +1,38 @@
 import duckdb
 
-con = duckdb.connect("work/olc/olc.duckdb")
+def main(con):
+    # 10_parse_all_bspl.py の出力（statement で hive パーティション済み）
+    con.execute("""
+    CREATE OR REPLACE TABLE bs AS
+    SELECT * FROM read_parquet('work/olc/parsed/bspl/**/*.parquet', hive_partitioning = 1)
+    WHERE statement = 'BS'
+    """)
 
-con.execute("""
-CREATE OR REPLACE TABLE bs AS
-SELECT * FROM read_parquet('work/olc/parsed/bs_*.parquet')
-""")
+    con.execute("""
+    CREATE OR REPLACE TABLE pl AS
+    SELECT * FROM read_parquet('work/olc/parsed/bspl/**/*.parquet', hive_partitioning = 1)
+    WHERE statement = 'PL'
+    """)
 
-con.execute("""
-CREATE OR REPLACE TABLE pl AS
-SELECT * FROM read_parquet('work/olc/parsed/pl_*.parquet')
-""")
+    # item（科目名）は種類が少なく繰り返しが多いので ENUM にして比較・集約を整数で行う
+    con.execute("DROP TYPE IF EXISTS item_enum")
+    con.execute("""
+    CREATE TYPE item_enum AS ENUM (
+      SELECT DISTINCT item FROM (SELECT item FROM bs UNION SELECT item FROM pl)
+      WHERE item IS NOT NULL
+      ORDER BY item  -- ENUM の ORDER BY は定義順なので文字列順で定義しておく
+    )
+    """)
+    con.execute("ALTER TABLE bs ALTER item SET DATA TYPE item_enum")
+    con.execute("ALTER TABLE pl ALTER item SET DATA TYPE item_enum")
 
-print("bs rows:", con.execute("SELECT COUNT(*) FROM bs").fetchone()[0])
-print("pl rows:", con.execute("SELECT COUNT(*) FROM pl").fetchone()[0])
+    print("bs rows:", con.execute("SELECT COUNT(*) FROM bs").fetchone()[0])
+    print("pl rows:", con.execute("SELECT COUNT(*) FROM pl").fetchone()[0])
 
-print("pl periods:", con.execute("select period, count(*) from pl group by period order by period").fetchall())
-print("bs periods:", con.execute("select period, count(*) from bs group by period order by period").fetchall())
+    print("pl periods:", con.execute("select period, count(*) from pl group by period order by period").fetchall())
+    print("bs periods:", con.execute("select period, count(*) from bs group by period order by period").fetchall())
+
+if __name__ == "__main__":
+    con = duckdb.connect("work/olc/olc.duckdb")
+    con.execute("PRAGMA enable_object_cache")  # parquet のメタデータをキャッシュ
+    main(con)
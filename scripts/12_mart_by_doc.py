@@ -1,37 +1,54 @@
+import os
 import duckdb
 import pandas as pd
 
-con = duckdb.connect("work/olc/olc.duckdb")
+def main(con, export_csv=False):
+    # doc_idごとに主要科目を作る（当期/前期）
+    df = con.execute("""
+    WITH facts AS (
+      SELECT doc_id, period, period_ord, item, value_num FROM bs
+      WHERE item IN ('売上高','営業利益','当期利益','総資産','純資産')
+      UNION ALL
+      SELECT doc_id, period, period_ord, item, value_num FROM pl
+      WHERE item IN ('売上高','営業利益','当期利益','総資産','純資産')
+    ),
+    pivoted AS (
+      PIVOT facts
+      ON item IN ('売上高','営業利益','当期利益','総資産','純資産')
+      USING MAX(value_num)
+      GROUP BY doc_id, period, period_ord
+    ),
+    mart AS (
+      SELECT
+        doc_id,
+        period,
+        period_ord,
+        "売上高"   AS sales,
+        "営業利益" AS op_profit,
+        "当期利益" AS net_income,
+        "総資産"   AS total_assets,
+        "純資産"   AS equity
+      FROM pivoted
+    )
+    SELECT * EXCLUDE (period_ord) FROM mart
+    ORDER BY doc_id, period_ord
+    """).df()
 
-# doc_idごとに主要科目を作る（当期/前期）
-df = con.execute("""
-WITH facts AS (
-  SELECT doc_id, period, item, value_num FROM bs
-  UNION ALL
-  SELECT doc_id, period, item, value_num FROM pl
-),
-mart AS (
-  SELECT
-    doc_id,
-    period,
-    MAX(CASE WHEN item='売上高'   THEN value_num END) AS sales,
-    MAX(CASE WHEN item='営業利益' THEN value_num END) AS op_profit,
-    MAX(CASE WHEN item='当期利益' THEN value_num END) AS net_income,
-    MAX(CASE WHEN item='総資産'   THEN value_num END) AS total_assets,
-    MAX(CASE WHEN item='純資産'   THEN value_num END) AS equity
-  FROM facts
-  GROUP BY doc_id, period
-)
-SELECT * FROM mart
-ORDER BY doc_id, CASE period
-  WHEN 'Prior2Year' THEN 1
-  WHEN 'Prior1Year' THEN 2
-  WHEN 'CurrentYear' THEN 3
-  ELSE 9 END
-""").df()
+    print(df)
 
-print(df)
+    # 「時系列化の材料」を parquet で保存（13 が読む）。CSV は目視確認用に必要なときだけ
+    df.to_parquet("work/olc/mart_by_doc_period.parquet", engine="pyarrow", compression="zstd", index=False)
+    print("\nSaved: work/olc/mart_by_doc_period.parquet")
+    if export_csv:
+        df.to_csv("work/olc/mart_by_doc_period.csv", index=False, encoding="utf-8-sig")
+        print("Saved: work/olc/mart_by_doc_period.csv")
 
-# ここでは「時系列化の材料」をCSVにして目視できるように保存
-df.to_csv("work/olc/mart_by_doc_period.csv", index=False, encoding="utf-8-sig")
-print("\nSaved: work/olc/mart_by_doc_period.csv")
+if __name__ == "__main__":
+    import argparse
+    p = argparse.ArgumentParser()
+    p.add_argument("--export_csv", action="store_true", help="目視確認用に CSV も出力する")
+    args = p.parse_args()
+
+    con = duckdb.connect("work/olc/olc.duckdb")
+    con.execute(f"PRAGMA threads={os.cpu_count()}")
+    main(con, args.export_csv)
@@ -1,42 +1,53 @@
-import pandas as pd
-import numpy as np
+import argparse
+import duckdb
 
-df = pd.read_csv("work/olc/mart_by_doc_period.csv")
+p = argparse.ArgumentParser()
+p.add_argument("--export_csv", action="store_true", help="目視確認用に CSV も出力する")
+args = p.parse_args()
 
-# 新しい有報 = CurrentYearの売上が最大のdoc_id（簡易だが今回は確実）
-cur = df[df["period"]=="CurrentYear"].copy()
-new_doc = cur.sort_values("sales", ascending=False).iloc[0]["doc_id"]
-
-# 年0（当期）と年-1（前期）
-y0 = df[(df.doc_id==new_doc) & (df.period=="CurrentYear")].iloc[0]
-y1 = df[(df.doc_id==new_doc) & (df.period=="Prior1Year")].iloc[0]
+con = duckdb.connect()
+con.execute("CREATE VIEW mart AS SELECT * FROM read_parquet('work/olc/mart_by_doc_period.parquet')")
 
-# 1つ前の有報 = CurrentYearの売上が y1.sales と一致するdoc_id
-# （浮動小数の誤差もあるので isclose）
-cand = df[(df.period=="CurrentYear") & (df.doc_id!=new_doc)].copy()
-cand["match"] = np.isclose(cand["sales"], y1["sales"], rtol=0, atol=0.5)  # 0.5円誤差許容（実質ぴったりのはず）
-prev_docs = cand[cand["match"]]["doc_id"].unique()
+# doc_id の選び方を1本のクエリで行う
+# 新しい有報 = CurrentYearの売上が最大のdoc_id（簡易だが今回は確実）
+# 1つ前の有報 = CurrentYearの売上が 新しい有報の Prior1Year 売上と一致するdoc_id
+# （浮動小数の誤差もあるので 0.5円まで許容。実質ぴったりのはず）
+new_doc, prev_docs = con.execute("""
+WITH new_doc AS (
+  SELECT doc_id FROM mart WHERE period = 'CurrentYear'
+  ORDER BY sales DESC NULLS LAST LIMIT 1
+),
+y1 AS (
+  SELECT m.sales FROM mart m JOIN new_doc n USING (doc_id) WHERE m.period = 'Prior1Year'
+)
+SELECT
+  (SELECT doc_id FROM new_doc),
+  (SELECT list(DISTINCT m.doc_id ORDER BY m.doc_id) FROM mart m, y1
+   WHERE m.period = 'CurrentYear'
+     AND m.doc_id <> (SELECT doc_id FROM new_doc)
+     AND abs(m.sales - y1.sales) <= 0.5)
+""").fetchone()
 
-if len(prev_docs) == 0:
+if not prev_docs:
     raise SystemExit("前期で重なるdoc_idが見つかりませんでした（2本目の有報が別期間かも）")
 if len(prev_docs) > 1:
     print("WARNING: 候補が複数あります。最初の候補を使います:", prev_docs)
 
 prev_doc = prev_docs[0]
 
-# 年-2（前々期）= 1つ前の有報の Prior1Year
-y2 = df[(df.doc_id==prev_doc) & (df.period=="Prior1Year")].iloc[0]
-
-out = pd.DataFrame([
-    {"t":"t-2", **y2.to_dict()},
-    {"t":"t-1", **y1.to_dict()},
-    {"t":"t0",  **y0.to_dict()},
-])
+# 年0（当期）と年-1（前期）は新しい有報から、年-2（前々期）は1つ前の有報の Prior1Year から
+out = con.execute("""
+SELECT 't-2' AS t, * FROM mart WHERE doc_id = $prev AND period = 'Prior1Year'
+UNION ALL
+SELECT 't-1' AS t, * FROM mart WHERE doc_id = $new AND period = 'Prior1Year'
+UNION ALL
+SELECT 't0' AS t, * FROM mart WHERE doc_id = $new AND period = 'CurrentYear'
+""", {"new": new_doc, "prev": prev_doc}).df()
 
-# 指標
-out["op_margin"]    = out["op_profit"] / out["sales"]
-out["roa"]          = out["net_income"] / out["total_assets"]
-out["equity_ratio"] = out["equity"] / out["total_assets"]
+# 指標（比率は単精度で十分。金額は円単位の精度が要るので float64 のまま）
+out["op_margin"]    = (out["op_profit"] / out["sales"]).astype("float32")
+out["roa"]          = (out["net_income"] / out["total_assets"]).astype("float32")
+out["equity_ratio"] = (out["equity"] / out["total_assets"]).astype("float32")
 
 # 見やすく（億円・%）列も追加
 out["sales_oku"] = out["sales"] / 1e8
@@ -44,9 +55,13 @@ out["op_margin_pct"] = out["op_margin"] * 100
 out["roa_pct"] = out["roa"] * 100
 out["equity_ratio_pct"] = out["equity_ratio"] * 100
 
-out.to_csv("work/olc/timeseries_3y.csv", index=False, encoding="utf-8-sig")
+out.to_parquet("work/olc/timeseries_3y.parquet", engine="pyarrow", compression="zstd", index=False)
+if args.export_csv:
+    out.to_csv("work/olc/timeseries_3y.csv", index=False, encoding="utf-8-sig")
 
 print(out[["t","sales_oku","op_margin_pct","roa_pct","equity_ratio_pct"]])
-print("\nSaved: work/olc/timeseries_3y.csv")
+print("\nSaved: work/olc/timeseries_3y.parquet")
+if args.export_csv:
+    print("Saved: work/olc/timeseries_3y.csv")
 print("new_doc (t0,t-1):", new_doc)
 print("prev_doc (t-2):", prev_doc)
@@ -1,4 +1,6 @@
 import os, csv, datetime
+import operator
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 try:
@@ -9,16 +11,22 @@ except Exception:
 
 from edinet2dataset.downloader import Downloader
 
-def safe_get(obj, *names):
+def make_getter(sample, *names):
+    # 属性名は最初のレコードで1回だけ決め、以降は attrgetter で取る（無ければ常に None）
     for n in names:
-        if hasattr(obj, n):
-            return getattr(obj, n)
-    return None
+        if hasattr(sample, n):
+            return operator.attrgetter(n)
+    return lambda _: None
 
-def main(edinet_code: str, start_date: str, end_date: str, n: int = 5, out_root: str = "data"):
+def main(edinet_code: str, start_date: str, end_date: str, n: int = 5, out_root: str = "data", max_workers: int = 4):
     dl = Downloader()
     results = dl.get_results(start_date, end_date, edinet_code=edinet_code)
 
+    sample = results[0] if results else None
+    get_doc_id = make_getter(sample, "docID", "docId", "doc_id")
+    get_submit = make_getter(sample, "submitDateTime", "submitDatetime", "submit_date_time")
+    get_desc = make_getter(sample, "docDescription", "doc_description")
+
     annual = []
     for r in results:
         if dl.get_doc_type(r.ordinanceCode, r.formCode) == "annual":
@@ -26,16 +34,14 @@ def main(edinet_code: str, start_date: str, end_date: str, n: int = 5, out_root:
 
     # submitDateTime が取れればそれで降順ソート（無ければ docID で降順）
     def sort_key(r):
-        sdt = safe_get(r, "submitDateTime", "submitDatetime", "submit_date_time")
-        did = safe_get(r, "docID", "docId", "doc_id")
-        return (sdt or "", did or "")
+        return (get_submit(r) or "", get_doc_id(r) or "")
     annual.sort(key=sort_key, reverse=True)
 
     # doc_id 重複排除して上位 n 本
     picked = []
     seen = set()
     for r in annual:
-        did = safe_get(r, "docID", "docId", "doc_id")
+        did = get_doc_id(r)
         if not did or did in seen:
             continue
         seen.add(did)
@@ -52,20 +58,20 @@ def main(edinet_code: str, start_date: str, end_date: str, n: int = 5, out_root:
         w = csv.DictWriter(f, fieldnames=["doc_id", "submitDateTime", "docDescription"])
         w.writeheader()
         for r in picked:
-            doc_id = safe_get(r, "docID", "docId", "doc_id")
             w.writerow({
-                "doc_id": doc_id,
-                "submitDateTime": safe_get(r, "submitDateTime", "submitDatetime", "submit_date_time"),
-                "docDescription": safe_get(r, "docDescription", "doc_description"),
+                "doc_id": get_doc_id(r),
+                "submitDateTime": get_submit(r),
+                "docDescription": get_desc(r),
             })
 
     # TSVをDL（downloader本体は type=5 で doc_id.tsv を保存する実装） 
-    for r in picked:
-        doc_id = safe_get(r, "docID", "docId", "doc_id")
-        dl.download_document(doc_id, file_type="tsv", output_dir=str(out_dir))
+    # ネットワーク待ちが中心なのでスレッドで並列に（接続は dl.session を使い回す）
+    doc_ids = [get_doc_id(r) for r in picked]
+    with ThreadPoolExecutor(max_workers=max_workers) as ex:
+        list(ex.map(lambda doc_id: dl.download_document(doc_id, file_type="tsv", output_dir=str(out_dir)), doc_ids))
 
     print("Saved:", meta_path)
-    print("Downloaded TSVs:", [safe_get(r, "docID", "docId", "doc_id") for r in picked])
+    print("Downloaded TSVs:", doc_ids)
 
 if __name__ == "__main__":
     import argparse
@@ -75,5 +81,6 @@ if __name__ == "__main__":
     p.add_argument("--end_date", default="2025-12-31")
     p.add_argument("--n", type=int, default=5)
     p.add_argument("--out_root", default="data")
+    p.add_argument("--max_workers", type=int, default=4)
     args = p.parse_args()
-    main(args.edinet_code, args.start_date, args.end_date, args.n, args.out_root)
+    main(args.edinet_code, args.start_date, args.end_date, args.n, args.out_root, args.max_workers)
@@ -1,6 +1,8 @@
 from pathlib import Path
 import csv
 import datetime
+import operator
+from concurrent.futures import ThreadPoolExecutor
 
 try:
     from dotenv import load_dotenv
@@ -10,18 +12,23 @@ except Exception:
 
 from edinet2dataset.downloader import Downloader
 
-def get_attr(x, *names):
+DOC_ID_NAMES = ("docID", "docId", "doc_id")
+SUBMIT_NAMES = ("submitDateTime", "submitDatetime", "submit_date_time")
+DESC_NAMES = ("docDescription", "doc_description")
+
+def make_getter(sample, *names):
+    # 属性名は最初のレコードで1回だけ決め、以降は attrgetter で取る（無ければ常に None）
     for n in names:
-        if hasattr(x, n):
-            return getattr(x, n)
-    return None
+        if hasattr(sample, n):
+            return operator.attrgetter(n)
+    return lambda _: None
 
-def is_good_annual(dl, r):
+def is_good_annual(dl, r, get_desc):
     # doc_type 判定（annual）
     if dl.get_doc_type(r.ordinanceCode, r.formCode) != "annual":
         return False
     # docDescription が取れるなら「有価証券報告書」だけ & 「訂正」除外で安定化
-    desc = (get_attr(r, "docDescription", "doc_description") or "")
+    desc = (get_desc(r) or "")
     if desc:
         if ("有価証券報告書" not in desc):
             return False
@@ -30,7 +37,7 @@ def is_good_annual(dl, r):
     return True
 
 def main(edinet_code: str, n: int = 5, start_year: int = None, end_year: int = None,
-         month_from: int = 5, month_to: int = 7, out_root: str = "data"):
+         month_from: int = 5, month_to: int = 7, out_root: str = "data", max_workers: int = 4):
 
     today = datetime.date.today()
     if end_year is None:
@@ -50,27 +57,30 @@ def main(edinet_code: str, n: int = 5, start_year: int = None, end_year: int = N
         end_date = f"{y}-{month_to:02d}-31"
         results = dl.get_results(start_date, end_date, edinet_code=edinet_code)
 
-        annuals = [r for r in results if is_good_annual(dl, r)]
+        get_desc = make_getter(results[0] if results else None, *DESC_NAMES)
+        annuals = [r for r in results if is_good_annual(dl, r, get_desc)]
         if not annuals:
             # 取りこぼし保険：その年だけ 4〜8月に拡張して再検索（必要な場合だけ）
             start_date2 = f"{y}-04-01"
             end_date2 = f"{y}-08-31"
             results2 = dl.get_results(start_date2, end_date2, edinet_code=edinet_code)
-            annuals = [r for r in results2 if is_good_annual(dl, r)]
+            get_desc = make_getter(results2[0] if results2 else None, *DESC_NAMES)
+            annuals = [r for r in results2 if is_good_annual(dl, r, get_desc)]
 
         if not annuals:
             print(f"[{y}] annual not found")
             continue
 
         # submitDateTime があればそれで新しい順、無ければ docID
+        get_submit = make_getter(annuals[0], *SUBMIT_NAMES)
+        get_doc_id = make_getter(annuals[0], *DOC_ID_NAMES)
+
         def k(r):
-            sdt = get_attr(r, "submitDateTime", "submitDatetime", "submit_date_time") or ""
-            did = get_attr(r, "docID", "docId", "doc_id") or ""
-            return (sdt, did)
+            return (get_submit(r) or "", get_doc_id(r) or "")
 
         annuals.sort(key=k, reverse=True)
         r = annuals[0]
-        doc_id = get_attr(r, "docID", "docId", "doc_id")
+        doc_id = get_doc_id(r)
         if not doc_id:
             continue
 
@@ -78,6 +88,11 @@ def main(edinet_code: str, n: int = 5, start_year: int = None, end_year: int = N
         if len(picked) >= n:
             break
 
+    sample = picked[0] if picked else None
+    get_doc_id = make_getter(sample, *DOC_ID_NAMES)
+    get_submit = make_getter(sample, *SUBMIT_NAMES)
+    get_desc = make_getter(sample, *DESC_NAMES)
+
     # メタ保存
     meta_path = out_dir / "filings.csv"
     with meta_path.open("w", newline="", encoding="utf-8-sig") as f:
@@ -85,18 +100,18 @@ def main(edinet_code: str, n: int = 5, start_year: int = None, end_year: int = N
         w.writeheader()
         for r in picked:
             w.writerow({
-                "doc_id": get_attr(r, "docID", "docId", "doc_id"),
-                "submitDateTime": get_attr(r, "submitDateTime", "submitDatetime", "submit_date_time"),
-                "docDescription": get_attr(r, "docDescription", "doc_description"),
+                "doc_id": get_doc_id(r),
+                "submitDateTime": get_submit(r),
+                "docDescription": get_desc(r),
             })
 
-    # TSV DL
-    for r in picked:
-        doc_id = get_attr(r, "docID", "docId", "doc_id")
-        dl.download_document(doc_id, file_type="tsv", output_dir=str(out_dir))
+    # TSV DL（ネットワーク待ちが中心なのでスレッドで並列に。接続は dl.session を使い回す）
+    doc_ids = [get_doc_id(r) for r in picked]
+    with ThreadPoolExecutor(max_workers=max_workers) as ex:
+        list(ex.map(lambda doc_id: dl.download_document(doc_id, file_type="tsv", output_dir=str(out_dir)), doc_ids))
 
     print("Saved:", meta_path)
-    print("Downloaded:", [get_attr(r, "docID", "docId", "doc_id") for r in picked])
+    print("Downloaded:", doc_ids)
 
 if __name__ == "__main__":
     import argparse
@@ -108,5 +123,7 @@ if __name__ == "__main__":
     p.add_argument("--month_from", type=int, default=5)
     p.add_argument("--month_to", type=int, default=7)
     p.add_argument("--out_root", default="data")
+    p.add_argument("--max_workers", type=int, default=4)
     args = p.parse_args()
-    main(args.edinet_code, args.n, args.start_year, args.end_year, args.month_from, args.month_to, args.out_root)
+    main(args.edinet_code, args.n, args.start_year, args.end_year, args.month_from, args.month_to, args.out_root,
+         args.max_workers)
@@ -7,10 +7,9 @@ template_ALL.csv の「項目」行に合わせて Y1..YN に CurrentYear の値
   .\.venv\Scripts\python.exe .\scripts\22_export_by_template.py --edinet_code E03120 --years 5 --template .\template_ALL.csv
 """
 
+import os
 import sys
 import re
-import ast
-import subprocess
 from pathlib import Path
 import pandas as pd
 import numpy as np
@@ -18,6 +17,7 @@ import numpy as np
 # --- 数値正規化 --------------------------------------------------------------
 
 DASHES = {"", "－", "―", "ー", "-", "–", "—"}  # EDINETでよく出る「該当なし」表現
+_NUM_STRIP = re.compile(r"[^\d\.eE\+\-]")  # 数値に使う文字以外
 
 def normalize_number(val):
     """
@@ -51,8 +51,13 @@ def normalize_number(val):
         neg = True
         s = s[1:-1].strip()
 
+    # 数字だけ（小数点1つまで）のよくある値は正規表現を通さずに変換する
+    if s.replace(".", "", 1).isdecimal():
+        x = float(s)
+        return -x if neg else x
+
     # 数字・記号以外を除去（念のため）
-    s = re.sub(r"[^\d\.eE\+\-]", "", s).strip()
+    s = _NUM_STRIP.sub("", s).strip()
     if s in DASHES:
         return None
 
@@ -74,50 +79,42 @@ def to_float_or_blank(val, ndigits=2):
         return ""
     return round(float(x), ndigits)
 
-# --- parser 呼び出し（カテゴリ別） -------------------------------------------
-
-_PARSE_CACHE = {}
-
-def parse_category(tsv_path: Path, category: str):
-    """
-    edinet2dataset の parser を subprocess で呼び出し、
-    末尾に出る dict 表現を ast.literal_eval で復元して返す。
-
-    戻り: { item: { period: value } }
-    """
-    key = (str(tsv_path), category)
-    if key in _PARSE_CACHE:
-        return _PARSE_CACHE[key]
-
-    # venv python で repo 内の parser.py を直接叩く（環境混線回避）
-    cmd = [
-        sys.executable,
-        "src/edinet2dataset/parser.py",
-        "--file_path", str(tsv_path),
-        "--category_list", category
-    ]
-    out = subprocess.check_output(cmd, text=True, errors="replace")
+# --- parser 呼び出し（同一プロセス） -----------------------------------------
 
-    lines = [l.strip() for l in out.splitlines() if l.strip().startswith("{") and l.strip().endswith("}")]
-    if not lines:
-        raise RuntimeError(f"parser output dict not found: {tsv_path} {category}")
+try:
+    from _parser_cache import parse_all
+    from _tsv_io import write_small_tsv
+except ImportError:
+    # scripts/ 以外から読み込まれたとき用
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    from _parser_cache import parse_all
+    from _tsv_io import write_small_tsv
 
-    d = ast.literal_eval(lines[-1])
-    _PARSE_CACHE[key] = d
-    return d
+_MISSING = object()  # 値が None の period と「period が無い」を区別するための目印
 
 def pick(d, candidates, period="CurrentYear"):
     """
     candidates の順に item を探し、見つかった最初の値を返す。
     """
     for k in candidates:
-        if k in d and period in d[k]:
-            return d[k][period]
+        v = d.get(k)  # `k in d` と d[k] の二重引きをしない
+        if v is not None:
+            x = v.get(period, _MISSING)  # `period in v` と v[period] も1回で引く
+            if x is not _MISSING:
+                return x
     return None
 
 def sum_vals(*vals):
-    nums = [normalize_number(v) for v in vals]
-    nums = [v for v in nums if v is not None]
+    # 数値はそのまま使い、文字列だけ normalize_number を通す
+    nums = [
+        x
+        for x in (
+            float(v) if isinstance(v, (int, float)) and v == v else normalize_number(v)
+            for v in vals
+            if v is not None
+        )
+        if x is not None
+    ]
     if not nums:
         return None
     return float(sum(nums))
@@ -188,15 +185,45 @@ FROM = {
     "発行済株式数": "OTHER",
 }
 
+# 合計が取れないときに内訳（BS）を足して作る項目
+DERIVED = {
+    # 商品/製品/原材料/仕掛品/半製品/貯蔵品 を足す
+    "棚卸資産（合計）": [
+        ["商品", "商品及び製品"],
+        ["製品", "商品及び製品"],
+        ["原材料", "原材料及び貯蔵品"],
+        ["仕掛品"],
+        ["半製品"],
+        ["貯蔵品", "原材料及び貯蔵品"],
+    ],
+    "売上債権（合計）": [["売掛金"], ["受取手形"], ["電子記録債権"]],
+    "仕入債務（合計）": [["買掛金"], ["支払手形"], ["電子記録債務"]],
+    "有利子負債": [
+        ["短期借入金"],
+        ["1年内返済予定の長期借入金"],
+        ["長期借入金"],
+        ["社債"],
+        ["リース債務"],
+        ["リース債務（流動負債）"],
+        ["リース債務（固定負債）"],
+    ],
+}
+
+def derive_all(bs):
+    """DERIVED の各項目を内訳の合計で求める（docごとに1回だけ）"""
+    return {item: sum_vals(*(pick(bs, c) for c in parts)) for item, parts in DERIVED.items()}
+
 FLOAT_ITEMS = {
     "EPS（1株当たり利益）",
     "DPS（1株当たり配当）",
     "株価",
 }
 
+_Y_RE = re.compile(r"Y(\d+)")
+
 def sort_ycols(cols):
     def key(c):
-        m = re.match(r"Y(\d+)", c)
+        m = _Y_RE.match(c)
         return int(m.group(1)) if m else 999
     return sorted(cols, key=key)
 
@@ -222,10 +249,7 @@ def build_one_company(edinet_code: str, template_path: str, years: int, out_dir:
     if not ycols:
         raise SystemExit("template に Y列（Y1..）がありません")
 
-    # 代入で FutureWarning が出ないように object に統一
     out = tpl.copy()
-    for c in ycols:
-        out[c] = out[c].astype("object")
 
     # doc_id リスト（filings.csv があれば submitDateTime で古→新）
     filings = data_dir / "filings.csv"
@@ -254,31 +278,37 @@ def build_one_company(edinet_code: str, template_path: str, years: int, out_dir:
 
     # TSVパス
     tsv_paths = [data_dir / f"{d}.tsv" for d in use_doc_ids]
-    for p in tsv_paths:
-        if not p.exists():
-            raise SystemExit(f"TSV not found: {p}")
+    # 存在確認はファイルごとの exists() ではなく、ディレクトリ一覧1回でまとめて行う
+    with os.scandir(data_dir) as it:
+        present = {e.name for e in it if e.name.endswith(".tsv")}
+    missing = [p for p in tsv_paths if p.name not in present]
+    if missing:
+        raise SystemExit(f"TSV not found: {missing[0]}")
 
     # パース（docごとにPL/BS）
-    parsed = []
-    for p in tsv_paths:
-        pl = parse_category(p, "PL")
-        bs = parse_category(p, "BS")
-        parsed.append({"doc_id": p.stem, "PL": pl, "BS": bs})
+    parsed = [
+        {"doc_id": p.stem, "PL": d["PL"], "BS": d["BS"], "derived": derive_all(d["BS"])}
+        for p, d in zip(tsv_paths, parse_all(tsv_paths))
+    ]
 
     missing_items = []
 
-    # 各テンプレ行を埋める
-    for i, row in out.iterrows():
-        item = str(row["項目"]).strip()
+    # 値は列ごとの list に溜めて、最後に列単位で1回だけ代入する（.at の逐次代入を避ける）
+    cols = {yi: out[yi].astype("object").tolist() for yi in use_ycols}
 
+    # 行ごとの（項目, 取得元, 候補）を先に決めておく（年ループの中で毎回引かない）
+    plan = [
+        (item, FROM.get(item, None), CAND.get(item, [item]))
+        for item in out["項目"].fillna("").astype(str).str.strip().tolist()
+    ]
+
+    # 各テンプレ行を埋める
+    for i, (item, src, candidates) in enumerate(plan):
         # 空行などはスキップ
         if item == "" or item.lower() == "nan":
             continue
 
-        candidates = CAND.get(item, [item])
-
         for yi, rec in zip(use_ycols, parsed):
-            src = FROM.get(item, None)
             val = None
 
             if src == "PL":
@@ -293,55 +323,25 @@ def build_one_company(edinet_code: str, template_path: str, years: int, out_dir:
                 if val is None:
                     val = pick(rec["BS"], candidates)
 
-            # --- 派生（合計が無いときに内訳を足す） ---
-            if item == "棚卸資産（合計）" and val is None:
-                # 商品/製品/原材料/仕掛品/半製品/貯蔵品 を足す
-                val = sum_vals(
-                    pick(rec["BS"], ["商品", "商品及び製品"]),
-                    pick(rec["BS"], ["製品", "商品及び製品"]),
-                    pick(rec["BS"], ["原材料", "原材料及び貯蔵品"]),
-                    pick(rec["BS"], ["仕掛品"]),
-                    pick(rec["BS"], ["半製品"]),
-                    pick(rec["BS"], ["貯蔵品", "原材料及び貯蔵品"]),
-                )
-
-            if item == "売上債権（合計）" and val is None:
-                val = sum_vals(
-                    pick(rec["BS"], ["売掛金"]),
-                    pick(rec["BS"], ["受取手形"]),
-                    pick(rec["BS"], ["電子記録債権"]),
-                )
-
-            if item == "仕入債務（合計）" and val is None:
-                val = sum_vals(
-                    pick(rec["BS"], ["買掛金"]),
-                    pick(rec["BS"], ["支払手形"]),
-                    pick(rec["BS"], ["電子記録債務"]),
-                )
-
-            if item == "有利子負債" and val is None:
-                val = sum_vals(
-                    pick(rec["BS"], ["短期借入金"]),
-                    pick(rec["BS"], ["1年内返済予定の長期借入金"]),
-                    pick(rec["BS"], ["長期借入金"]),
-                    pick(rec["BS"], ["社債"]),
-                    pick(rec["BS"], ["リース債務"]),
-                    pick(rec["BS"], ["リース債務（流動負債）"]),
-                    pick(rec["BS"], ["リース債務（固定負債）"]),
-                )
+            # --- 派生（合計が無いときに内訳を足す。値は rec["derived"] に計算済み） ---
+            if val is None and item in DERIVED:
+                val = rec["derived"][item]
 
             # 代入（EPS等は float、他は int）
             if item in FLOAT_ITEMS:
-                out.at[i, yi] = to_float_or_blank(val, ndigits=2)
+                cols[yi][i] = to_float_or_blank(val, ndigits=2)
             else:
-                out.at[i, yi] = to_int_or_blank(val)
+                cols[yi][i] = to_int_or_blank(val)
 
         # 欠損チェック（全部空なら missing に載せる。ただしMANUAL/OTHERは除外）
-        if FROM.get(item, None) not in ("MANUAL", "OTHER"):
-            filled = [out.at[i, c] for c in use_ycols]
+        if src not in ("MANUAL", "OTHER"):
+            filled = [cols[c][i] for c in use_ycols]
             if all((x == "" or pd.isna(x)) for x in filled):
                 missing_items.append(item)
 
+    for yi in use_ycols:
+        out[yi] = pd.Series(cols[yi], index=out.index, dtype="object")
+
     outp = Path(out_dir)
     outp.mkdir(parents=True, exist_ok=True)
 
@@ -351,17 +351,15 @@ def build_one_company(edinet_code: str, template_path: str, years: int, out_dir:
 
     # Y列とdoc_id対応（古→新）
     labels_path = outp / f"{edinet_code}_labels.tsv"
-    lab = pd.DataFrame({
-        "Y": use_ycols,
-        "doc_id": [r["doc_id"] for r in parsed],
-        "submitDateTime": [submit_map.get(r["doc_id"], "") for r in parsed],
-        "docDescription": [desc_map.get(r["doc_id"], "") for r in parsed],
-    })
-    lab.to_csv(labels_path, sep="\t", index=False, encoding="utf-8-sig")
+    write_small_tsv(
+        labels_path,
+        ["Y", "doc_id", "submitDateTime", "docDescription"],
+        [(yi, r["doc_id"], submit_map.get(r["doc_id"], ""), desc_map.get(r["doc_id"], "")) for yi, r in zip(use_ycols, parsed)],
+    )
 
     # 取れなかった項目一覧
     miss_path = outp / f"{edinet_code}_missing_items.tsv"
-    pd.DataFrame({"missing_items": sorted(set(missing_items))}).to_csv(miss_path, sep="\t", index=False, encoding="utf-8-sig")
+    write_small_tsv(miss_path, ["missing_items"], [(x,) for x in sorted(set(missing_items))])
 
     print("Saved:", out_path)
     print("Saved:", labels_path)
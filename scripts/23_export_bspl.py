@@ -1,23 +1,30 @@
 from __future__ import annotations
 
 import argparse
-import ast
 import json
+import os
 import re
-import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional
 
 import pandas as pd
 
+try:
+    import orjson
+
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
 # ---------------------------
 # 数値正規化
 # ---------------------------
 
 DASHES = {"", "－", "―", "ー", "-", "–", "—"}  # EDINETでよく出る「該当なし」表現
+_NUM_STRIP = re.compile(r"[^\d\.eE\+\-]")  # 数値に使う文字以外
 
 
 def normalize_number(val):
@@ -49,7 +56,12 @@ def normalize_number(val):
         neg = True
         s = s[1:-1].strip()
 
-    s = re.sub(r"[^\d\.eE\+\-]", "", s).strip()
+    # 数字だけ（小数点1つまで）のよくある値は正規表現を通さずに変換する
+    if s.replace(".", "", 1).isdecimal():
+        x = float(s)
+        return -x if neg else x
+
+    s = _NUM_STRIP.sub("", s).strip()
     if s in DASHES or s == "":
         return None
 
@@ -70,87 +82,33 @@ def to_int_or_blank(val):
 
 
 # ---------------------------
-# edinet2dataset parser 呼び出し
+# edinet2dataset parser 呼び出し（同一プロセス）
 # ---------------------------
 
-_PARSE_CACHE: Dict[Tuple[str, str], Dict] = {}
-
-
-def _resolve_parser_path() -> Path:
-    """
-    scripts/ 直下に置かれる想定で、repo root を推定して parser.py を探す。
-    見つからなければ cwd 相対の src/... を使う。
-    """
-    here = Path(__file__).resolve()
-    repo_root = here.parent.parent  # scripts/.. = repo root 想定
-    cand = repo_root / "src" / "edinet2dataset" / "parser.py"
-    if cand.exists():
-        return cand
-    cand2 = Path("src") / "edinet2dataset" / "parser.py"
-    return cand2
-
-
-PARSER_PATH = _resolve_parser_path()
-
-
-def parse_category(tsv_path: Path, category: str) -> Dict:
-    """
-    edinet2dataset の parser を subprocess で呼び出し、
-    末尾に出る dict 表現を ast.literal_eval で復元して返す。
-
-    戻り: { item: { period: value } }
-    """
-    key = (str(tsv_path), category)
-    if key in _PARSE_CACHE:
-        return _PARSE_CACHE[key]
-
-    if not PARSER_PATH.exists():
-        raise RuntimeError(
-            f"parser.py not found: {PARSER_PATH}\n"
-            f"repo直下で実行しているか確認してください（src/edinet2dataset/parser.py が必要）"
-        )
-
-    cmd = [
-        sys.executable,
-        str(PARSER_PATH),
-        "--file_path",
-        str(tsv_path),
-        "--category_list",
-        category,
-    ]
-    out = subprocess.check_output(cmd, text=True, errors="replace")
-
-    lines = [
-        l.strip()
-        for l in out.splitlines()
-        if l.strip().startswith("{") and l.strip().endswith("}")
-    ]
-    if not lines:
-        raise RuntimeError(f"parser output dict not found: {tsv_path} {category}")
-
-    d = ast.literal_eval(lines[-1])
-    _PARSE_CACHE[key] = d
-    return d
+try:
+    from _parser_cache import parse_all
+    from _tsv_io import write_small_tsv
+except ImportError:
+    # scripts/ 以外から読み込まれたとき用
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    from _parser_cache import parse_all
+    from _tsv_io import write_small_tsv
 
 
 # ---------------------------
 # JSONメタ読取・doc選別
 # ---------------------------
 
-def _parse_dt(s: str) -> Optional[datetime]:
-    if not s:
-        return None
-    s = str(s).strip()
-    fmts = ["%Y-%m-%d %H:%M", "%Y-%m-%d %H:%M:%S"]
-    for f in fmts:
-        try:
-            return datetime.strptime(s, f)
-        except Exception:
-            pass
-    return None
+def _parse_dt(sr: pd.Series) -> pd.Series:
+    """
+    submitDateTime の列をまとめて datetime に（読めないものは NaT）。
+    """
+    sr = sr.astype(str).str.strip()
+    dt = pd.to_datetime(sr, format="%Y-%m-%d %H:%M", errors="coerce")
+    return dt.fillna(pd.to_datetime(sr, format="%Y-%m-%d %H:%M:%S", errors="coerce"))
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class FilingMeta:
     doc_id: str
     period_end: str
@@ -160,60 +118,71 @@ class FilingMeta:
     tsv_path: Path
 
 
-def read_json_metas(data_dir: Path) -> List[FilingMeta]:
-    metas: List[FilingMeta] = []
-    for jp in data_dir.glob("*.json"):
-        try:
-            obj = json.loads(jp.read_text(encoding="utf-8"))
-        except Exception:
-            try:
-                obj = json.loads(jp.read_text(encoding="utf-8-sig"))
-            except Exception:
-                continue
-
-        doc_id = str(obj.get("docID") or jp.stem).strip()
-        period_end = str(obj.get("periodEnd") or "").strip()
-        submit_dt = str(obj.get("submitDateTime") or "").strip()
-        desc = str(obj.get("docDescription") or "").strip()
-
-        tsvp = data_dir / f"{doc_id}.tsv"
-        if not tsvp.exists():
-            # jsonはあるがtsvが無い（DL途中など）ならスキップ
-            continue
-
-        metas.append(
-            FilingMeta(
-                doc_id=doc_id,
-                period_end=period_end,
-                submit_dt=submit_dt,
-                desc=desc,
-                json_path=jp,
-                tsv_path=tsvp,
-            )
-        )
-    return metas
+def _load_meta(jp: Path, data_dir: Path, tsv_names: set) -> Optional[FilingMeta]:
+    try:
+        data = jp.read_bytes()
+        if data[:3] == b"\xef\xbb\xbf":  # BOM付き（utf-8-sig）
+            data = data[3:]
+        obj = _loads(data)
+    except Exception:
+        # 読めない（DL途中で消えた・ロック中など）・壊れた JSON はスキップ
+        return None
+
+    doc_id = str(obj.get("docID") or jp.stem).strip()
+    period_end = str(obj.get("periodEnd") or "").strip()
+    submit_dt = str(obj.get("submitDateTime") or "").strip()
+    desc = str(obj.get("docDescription") or "").strip()
+
+    tsvp = data_dir / f"{doc_id}.tsv"
+    if tsvp.name not in tsv_names:
+        # jsonはあるがtsvが無い（DL途中など）ならスキップ
+        return None
+
+    return FilingMeta(
+        doc_id=doc_id,
+        period_end=period_end,
+        submit_dt=submit_dt,
+        desc=desc,
+        json_path=jp,
+        tsv_path=tsvp,
+    )
+
+
+def read_json_metas(data_dir: Path, max_workers: int = 16) -> List[FilingMeta]:
+    # ファイルごとの読み込みはI/O待ちが中心なのでスレッドで並列に（順序は scandir 順のまま）
+    # json/tsv の一覧はディレクトリを1回走査して取る（tsv の存在確認を exists() で1件ずつしない）
+    with os.scandir(data_dir) as it:
+        entries = [e.name for e in it]
+    paths = [data_dir / n for n in entries if n.endswith(".json")]
+    tsv_names = {n for n in entries if n.endswith(".tsv")}
+    with ThreadPoolExecutor(max_workers=max_workers) as ex:
+        metas = list(ex.map(lambda jp: _load_meta(jp, data_dir, tsv_names), paths))
+    return [m for m in metas if m is not None]
 
 
 def select_latest_per_period(metas: List[FilingMeta]) -> List[FilingMeta]:
     """
     同じ period_end が複数ある（訂正など）場合は、submitDateTime が最新のものを採用。
     """
-    by_period: Dict[str, List[FilingMeta]] = {}
-    for m in metas:
-        if not m.period_end:
-            continue
-        by_period.setdefault(m.period_end, []).append(m)
-
-    chosen: List[FilingMeta] = []
-    for pend, arr in by_period.items():
-        arr_sorted = sorted(
-            arr,
-            key=lambda x: (_parse_dt(x.submit_dt) or datetime.min, x.doc_id),
-        )
-        chosen.append(arr_sorted[-1])  # 最新
-    # period_end 昇順
-    chosen.sort(key=lambda x: x.period_end)
-    return chosen
+    df = pd.DataFrame(
+        {
+            "period_end": [m.period_end for m in metas],
+            "doc_id": [m.doc_id for m in metas],
+            "submit_dt": [m.submit_dt for m in metas],
+        }
+    )
+    df = df[df["period_end"] != ""]
+    if df.empty:
+        return []
+    df["sdt"] = _parse_dt(df["submit_dt"])
+
+    # period_end ごとに (submitDateTime, doc_id) が最大の1件（日時が読めないものは最も古い扱い）
+    # 並びは period_end 昇順になる
+    chosen = (
+        df.sort_values(["period_end", "sdt", "doc_id"], na_position="first", kind="stable")
+        .drop_duplicates("period_end", keep="last")
+    )
+    return [metas[i] for i in chosen.index]
 
 
 def take_last_n_periods(metas_unique: List[FilingMeta], years: int) -> List[FilingMeta]:
@@ -241,16 +210,17 @@ def build_wide_df(parsed_list: List[Dict], col_labels: List[str]) -> pd.DataFram
     col_labels:  years 個（例: periodEnd）
     """
     items = union_items(parsed_list)
-    rows = []
-    for item in items:
-        row = {"項目": item}
-        for d, col in zip(parsed_list, col_labels):
-            val = None
-            if item in d and isinstance(d[item], dict):
-                val = d[item].get("CurrentYear")
-            row[col] = to_int_or_blank(val)
-        rows.append(row)
-    return pd.DataFrame(rows)
+    if not items:
+        return pd.DataFrame()
+
+    # 行ごとの dict を作らず、列ごとのリストから一度に DataFrame を作る
+    cols = {"項目": items}
+    for d, col in zip(parsed_list, col_labels):
+        cols[col] = [
+            to_int_or_blank(d[item].get("CurrentYear") if isinstance(d.get(item), dict) else None)
+            for item in items
+        ]
+    return pd.DataFrame(cols)
 
 
 def export_one_company(
@@ -258,7 +228,7 @@ def export_one_company(
     corpus_root: Path,
     years: int,
     out_dir: Path,
-) -> Dict[str, Path]:
+) -> Dict[str, object]:
     data_dir = corpus_root / edinet_code
     if not data_dir.exists():
         raise SystemExit(f"data dir not found: {data_dir}")
@@ -276,14 +246,10 @@ def export_one_company(
     # 列名は periodEnd（ユニーク）
     col_labels = [m.period_end for m in use]
 
-    # パース
-    pl_list = []
-    bs_list = []
-    for m in use:
-        pl = parse_category(m.tsv_path, "PL")
-        bs = parse_category(m.tsv_path, "BS")
-        pl_list.append(pl)
-        bs_list.append(bs)
+    # パース（TSVごとにスレッド並列）
+    parsed = parse_all([m.tsv_path for m in use])
+    pl_list = [d["PL"] for d in parsed]
+    bs_list = [d["BS"] for d in parsed]
 
     out_dir.mkdir(parents=True, exist_ok=True)
 
@@ -296,24 +262,18 @@ def export_one_company(
     bs_df.to_csv(bs_path, sep="\t", index=False, encoding="utf-8-sig")
 
     labels_path = out_dir / f"{edinet_code}_labels.tsv"
-    lab = pd.DataFrame(
-        {
-            "col": col_labels,
-            "doc_id": [m.doc_id for m in use],
-            "periodEnd": [m.period_end for m in use],
-            "submitDateTime": [m.submit_dt for m in use],
-            "docDescription": [m.desc for m in use],
-            "tsv_path": [str(m.tsv_path) for m in use],
-        }
+    write_small_tsv(
+        labels_path,
+        ["col", "doc_id", "periodEnd", "submitDateTime", "docDescription", "tsv_path"],
+        [(c, m.doc_id, m.period_end, m.submit_dt, m.desc, str(m.tsv_path)) for c, m in zip(col_labels, use)],
     )
-    lab.to_csv(labels_path, sep="\t", index=False, encoding="utf-8-sig")
 
     print(f"[{edinet_code}] Saved: {pl_path}")
     print(f"[{edinet_code}] Saved: {bs_path}")
     print(f"[{edinet_code}] Saved: {labels_path}")
     print(f"[{edinet_code}] Used periods: {col_labels}")
 
-    return {"pl": pl_path, "bs": bs_path, "labels": labels_path}
+    return {"pl": pl_path, "bs": bs_path, "labels": labels_path, "pl_df": pl_df, "bs_df": bs_df}
 
 
 def parse_codes(args) -> List[str]:
@@ -363,8 +323,8 @@ def main():
 
         if not args.no_combined:
             # 会社ごとにPL/BSを long にして結合（学生がピボットしやすい）
-            for stmt, fp in [("PL", paths["pl"]), ("BS", paths["bs"])]:
-                df = pd.read_csv(fp, sep="\t", dtype="object")
+            # 書き出したTSVを読み直さず、手元の DataFrame をそのまま使う
+            for stmt, df in [("PL", paths["pl_df"]), ("BS", paths["bs_df"])]:
                 # wide -> long
                 long = df.melt(id_vars=["項目"], var_name="periodEnd", value_name="value")
                 long.insert(0, "statement", stmt)
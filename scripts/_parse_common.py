@@ -0,0 +1,27 @@
+"""
+01_parse_bs.py / 04_parse_pl.py 共通の TSV 探索と parser 出力の読み取り用の定数。
+"""
+
+import os
+import sys
+from pathlib import Path
+
+try:
+    from edinet2dataset.parser import JSON_SENTINEL  # parser --emit json の行頭
+except ImportError:
+    # 未インストールでも repo 内の src から読めるように（scripts/.. = repo root 想定）
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+    from edinet2dataset.parser import JSON_SENTINEL
+
+PERIOD_ORD = {"Prior2Year": 1, "Prior1Year": 2, "CurrentYear": 3}  # 並び順用（それ以外は 9）
+
+
+def find_tsvs(base: Path) -> list:
+    # E04707優先でTSVを探す（scandir はエントリごとの stat を省ける）
+    candidates = []
+    if (base / "E04707").exists():
+        with os.scandir(base / "E04707") as it:
+            candidates = [Path(e.path) for e in it if e.name.endswith(".tsv") and e.is_file()]
+    if not candidates:
+        candidates = list(base.rglob("*.tsv"))
+    return candidates
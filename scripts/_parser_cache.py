@@ -0,0 +1,104 @@
+"""
+22_export_by_template.py / 23_export_bspl.py 共通の parser 呼び出しとパース結果キャッシュ。
+同じプロセスで両方を使っても、TSVごとのパースは1回で済む。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    from edinet2dataset import element_id_table
+    from edinet2dataset.parser import parse_tsv
+except ImportError:
+    # 未インストールでも repo 内の src から読めるように（scripts/.. = repo root 想定）
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+    from edinet2dataset import element_id_table
+    from edinet2dataset.parser import parse_tsv
+
+_TSV_CACHE: Dict[str, Dict[str, Dict]] = {}  # 解決済みパス -> { "PL": ..., "BS": ... }
+_CACHE_LOCK = threading.Lock()  # parse_all からスレッド並列で呼ばれるため
+
+# パース結果のディスクキャッシュ（TSVは取得後に変わらないので、再実行時はパースを省ける）
+PARSE_CACHE_DIR = Path("work/.parse_cache")
+# パース結果は parser.py と科目の対応表（element_id_table.py）で決まるので、両方の更新時刻を見る
+_PARSER_MTIME = "|".join(
+    str(Path(mod.__file__).stat().st_mtime_ns)
+    for mod in (sys.modules[parse_tsv.__module__], element_id_table)
+)
+
+
+def _sha1(s: str) -> str:
+    return hashlib.sha1(s.encode("utf-8")).hexdigest()
+
+
+def _disk_cache_path(resolved: Path) -> Path:
+    # TSVごとのディレクトリに、TSVの更新時刻・サイズと parser の更新時刻をキーにしたファイルを置く
+    # （どれか変われば取り直し。古いものは _write_disk_cache が消す）
+    st = resolved.stat()
+    version = f"{st.st_mtime_ns}|{st.st_size}|{_PARSER_MTIME}"
+    return PARSE_CACHE_DIR / _sha1(str(resolved)) / f"{_sha1(version)}.pkl"
+
+
+def _write_disk_cache(cache_path: Path, data: bytes) -> None:
+    # 一時ファイルに書いてから置き換える（並列実行中に途中のファイルを読ませない）
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = cache_path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, cache_path)
+    # 同じTSVの古いキャッシュ（再ダウンロード前・parser 変更前のもの）を消す
+    with os.scandir(cache_path.parent) as it:
+        stale = [e.path for e in it if e.name != cache_path.name and not e.name.endswith(".tmp")]
+    for path in stale:
+        try:
+            os.remove(path)
+        except FileNotFoundError:  # 別スレッド・別プロセスが先に消した
+            pass
+
+
+def parse_both(tsv_path: Path) -> Dict[str, Dict]:
+    """
+    edinet2dataset の parser を同一プロセスで呼び、PL/BS をまとめて返す。
+    TSVごとに1回しか読まない（相対/絶対など書き方が違っても同じファイルなら共有）。
+
+    戻り: { "PL": { item: { period: value } }, "BS": {...} }
+    """
+    resolved = Path(tsv_path).resolve()
+    key = str(resolved)
+    if key in _TSV_CACHE:
+        return _TSV_CACHE[key]
+
+    cache_path = _disk_cache_path(resolved)
+    if cache_path.exists():
+        d = pickle.loads(cache_path.read_bytes())
+    else:
+        data = parse_tsv(tsv_path, ["PL", "BS"])  # 必要な表だけ抽出
+        if data is None:
+            raise RuntimeError(f"parser returned no data (連結なし?): {tsv_path}")
+
+        d = {"PL": data.pl, "BS": data.bs}
+        _write_disk_cache(cache_path, pickle.dumps(d, protocol=pickle.HIGHEST_PROTOCOL))
+
+    with _CACHE_LOCK:
+        _TSV_CACHE[key] = d
+    return d
+
+
+def parse_all(tsv_paths: List[Path], max_workers: Optional[int] = None) -> List[Dict[str, Dict]]:
+    """
+    複数TSVをスレッド並列で parse_both する（polars の読み込み中は GIL が外れる）。
+    戻りは tsv_paths と同じ順。
+    """
+    results: List[Optional[Dict[str, Dict]]] = [None] * len(tsv_paths)
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as ex:
+        futures = {ex.submit(parse_both, p): i for i, p in enumerate(tsv_paths)}
+        for f in as_completed(futures):
+            results[futures[f]] = f.result()
+    return results
@@ -0,0 +1,18 @@
+"""
+08_plot.py / 14_plot_3y.py 共通の折れ線グラフ保存。
+"""
+
+import matplotlib
+matplotlib.use("Agg")  # 画像保存だけなので GUI バックエンドは読み込まない
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+
+def save_line(x, y, title, path):
+    fig = Figure()
+    ax = fig.subplots()
+    ax.plot(x, y, marker="o")
+    ax.set_title(title)
+    fig.tight_layout()
+    FigureCanvasAgg(fig).print_png(path)
+    print("Saved:", path)
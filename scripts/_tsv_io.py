@@ -0,0 +1,16 @@
+"""
+22_export_by_template.py / 23_export_bspl.py 共通の小さな表のTSV書き出し。
+"""
+
+import csv
+import os
+from pathlib import Path
+from typing import List
+
+
+def write_small_tsv(path: Path, header: List[str], rows) -> None:
+    # 数十行程度の表なので DataFrame を作らず csv で直接書く（to_csv と同じ区切り・改行・BOM）
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        w = csv.writer(f, delimiter="\t", lineterminator=os.linesep)
+        w.writerow(header)
+        w.writerows(rows)
@@ -21,16 +21,29 @@ build_mj_inputs.py - 修正ジョーンズモデル用財務データ抽出ス
 使い方:
     python build_mj_inputs.py --target_companies target_companies.csv --out_dir out
 
+キャッシュ:
+    TSVの変換結果とDEIの読み取り結果を work/.parquet_cache, work/.utf8_cache, work/.dei_cache に置く。
+    再ダウンロードやスクリプトの変更で作り直され、不要になったものは消してよい
+    （rm -rf work/.parquet_cache work/.utf8_cache work/.dei_cache）。
+
 実行例:
     python scripts/build_mj_inputs.py --target_companies target_companies.csv
     python scripts/build_mj_inputs.py --annual_dir C:\\dev\\edinet2dataset\\edinet_corpus\\annual --num_workers 8
 """
 
 import argparse
+import hashlib
+import io
+import itertools
+import multiprocessing
+import os
+import pickle
 import re
+import threading
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from dataclasses import dataclass, field
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field, fields
+from operator import attrgetter
 from typing import Optional, Dict, List, Tuple, Any
 import warnings
 
@@ -69,6 +82,34 @@ UNIT_MAP = {
     "JPY": 1,
 }
 
+# 値が欠損とみなす表記
+MISSING_VALUES = ("", "－", "-", "―", "ー", "−", "nan", "None")
+
+# 数値化（円に統一）した値を持たせる列（DataFrameごとに1回だけ計算する）
+VALUE_NUM_COL = "値_normalized"
+# セグメントMemberの行かどうかを持たせる列（DataFrameごとに1回だけ計算する）
+SEGMENT_COL = "_is_segment_member"
+# 値の抽出で突き合わせるキー列
+INDEX_KEYS = ["要素ID", "相対年度", "期間・時点", "連結・個別"]
+# 抽出で使う列（TSVの他の列は読まない）
+MJ_COLUMNS = INDEX_KEYS + ["値", "単位", "コンテキストID"]
+# マイナス表記: (1234) または △1234 / ▲1234（括弧を優先。中身をグループで取り出す）
+SIGNED_VALUE_RE = r"(?s)^\((.*)\)$|^[△▲](.*)$"
+# 符号の判定用（同じ条件でグループなし。pandas の str.contains がグループ付きだと警告を出すため）
+NEGATIVE_VALUE_RE = r"(?s)^\(.*\)$|^[△▲]"
+
+# UTF-16のTSVを読みやすい形にして置いておく場所（2回目以降の読み込みで変換を省く）
+# polars は列指定で速く読める parquet、pandas（pyarrow が無いこともある）は UTF-8 のTSV
+# どのキャッシュも TSV ごとに最新の1つだけを残す
+PARQUET_CACHE_DIR = Path("work/.parquet_cache")
+UTF8_CACHE_DIR = Path("work/.utf8_cache")
+# read_tsv_dei_only の結果を置いておく場所（TSVかこのスクリプトが変わらなければ読み直さない）
+DEI_CACHE_DIR = Path("work/.dei_cache")
+_SCRIPT_MTIME = Path(__file__).stat().st_mtime_ns
+
+# YYYY-MM-DD or YYYY/MM/DD（呼び出しごとにコンパイルしない）
+_DATE_RE = re.compile(r"(\d{4})[-/](\d{2})[-/](\d{2})")
+
 # DEI要素ID
 DEI_ACCOUNTING_STANDARDS = "jpdei_cor:AccountingStandardsDEI"
 DEI_FISCAL_YEAR_START = "jpdei_cor:CurrentFiscalYearStartDateDEI"
@@ -117,10 +158,24 @@ ELEMENT_PPE = [
     "PropertyPlantAndEquipmentNet",
 ]  # 有形固定資産
 
+# 抽出で引く要素IDの全体（jppfs_cor:つき）。TSVは読み込み後すぐこれだけに絞る
+MJ_ELEMENT_IDS = [
+    f"jppfs_cor:{e}"
+    for e in (
+        ELEMENT_NET_SALES
+        + ELEMENT_PROFIT_LOSS
+        + ELEMENT_OPERATING_CF
+        + ELEMENT_ASSETS
+        + ELEMENT_REC_BASE
+        + ELEMENT_ECLAIMS
+        + ELEMENT_PPE
+    )
+]
+
 # =============================================================================
 # データクラス
 # =============================================================================
-@dataclass
+@dataclass(slots=True)
 class TSVMetadata:
     """TSVファイルのDEIメタデータ"""
     tsv_path: Path
@@ -134,7 +189,7 @@ class TSVMetadata:
     has_ifrs_us_gaap: bool = False  # IFRS/US-GAAPを含むか
 
 
-@dataclass
+@dataclass(slots=True)
 class MJInput:
     """修正ジョーンズモデル入力データ"""
     edinet_code: str
@@ -170,7 +225,7 @@ class MJInput:
     d_ar: Optional[float] = None  # 売掛金変化
 
 
-@dataclass
+@dataclass(slots=True)
 class MissingLog:
     """欠損ログ"""
     edinet_code: str
@@ -179,7 +234,7 @@ class MissingLog:
     missing_reason: str
 
 
-@dataclass
+@dataclass(slots=True)
 class DuplicateLog:
     """重複ログ"""
     edinet_code: str
@@ -190,7 +245,7 @@ class DuplicateLog:
     skipped_reason: str
 
 
-@dataclass
+@dataclass(slots=True)
 class RecDebugLog:
     """REC合成デバッグログ"""
     edinet_code: str
@@ -210,51 +265,112 @@ class RecDebugLog:
     rec_used_eclaims_eid_end_t1: Optional[str]
 
 
+def to_columns(records: list, cls) -> Dict[str, list]:
+    """
+    dataclass のリストを列ごとのリストにする（列は cls のフィールド順）。
+    行ごとの dict を作らずにそのまま DataFrame にできる。
+    """
+    return {f.name: [getattr(r, f.name) for r in records] for f in fields(cls)}
+
+
 # =============================================================================
 # ユーティリティ関数
 # =============================================================================
-def normalize_value(value_str: str, unit: str) -> Optional[float]:
+def add_normalized_values_polars(df: pl.DataFrame) -> pl.DataFrame:
     """
-    TSVの値を数値化して円に統一する。
-    - '－' / 空欄は欠損（NaN）
+    値/単位列から数値化して円に統一した列を、列演算で1回だけ作る。
+    - MISSING_VALUES（'－' / 空欄など）は欠損
     - カンマ除去
-    - 括弧 () はマイナス
-    - 単位により円に統一
+    - 括弧 () / 先頭の △▲ はマイナス
+    - 単位により円に統一（UNIT_MAP に無い単位は1倍）
     """
-    if value_str is None:
-        return None
-    
-    value_str = str(value_str).strip()
-    
-    # 欠損パターン
-    if value_str in ("", "－", "-", "―", "ー", "−", "nan", "None"):
-        return None
-    
-    try:
-        # カンマ除去
-        value_str = value_str.replace(",", "")
-        
-        # 括弧はマイナス: (1234) -> -1234
-        is_negative = False
-        if value_str.startswith("(") and value_str.endswith(")"):
-            is_negative = True
-            value_str = value_str[1:-1]
-        elif value_str.startswith("△") or value_str.startswith("▲"):
-            is_negative = True
-            value_str = value_str[1:]
-        
-        # 数値変換
-        value = float(value_str)
-        if is_negative:
-            value = -value
-        
-        # 単位変換
-        unit_multiplier = UNIT_MAP.get(unit, 1)
-        value = value * unit_multiplier
-        
-        return value
-    except (ValueError, TypeError):
-        return None
+    if "値" not in df.columns:
+        return df.with_columns(pl.lit(None, dtype=pl.Float64).alias(VALUE_NUM_COL))
+
+    # 同じ文字列処理を何度も評価しないよう、前処理済みの列を先に作っておく
+    tmp = df.with_columns(
+        pl.col("値").str.strip_chars().is_in(MISSING_VALUES).alias("_missing"),
+        pl.col("値").str.strip_chars().str.replace_all(",", "", literal=True).alias("_value"),
+    )
+    num = pl.col("_value").str.replace(SIGNED_VALUE_RE, "${1}${2}").str.strip_chars().cast(pl.Float64, strict=False)
+    sign = pl.when(pl.col("_value").str.contains(NEGATIVE_VALUE_RE)).then(-1.0).otherwise(1.0)
+    if "単位" in df.columns:
+        mult = pl.col("単位").replace_strict(UNIT_MAP, default=1, return_dtype=pl.Float64)
+    else:
+        mult = pl.lit(1.0)
+
+    return tmp.with_columns(
+        pl.when(pl.col("_missing")).then(None).otherwise(num * sign * mult).alias(VALUE_NUM_COL)
+    ).drop("_missing", "_value")
+
+
+def add_normalized_values_pandas(df):
+    """add_normalized_values_polars の pandas 版"""
+    df = df.copy()
+    if "値" not in df.columns:
+        df[VALUE_NUM_COL] = float("nan")
+        return df
+
+    s = df["値"].astype(str).str.strip()
+    missing = s.isin(MISSING_VALUES) | s.isna()
+    s = s.str.replace(",", "", regex=False)
+    num = pd.to_numeric(s.str.replace(SIGNED_VALUE_RE, r"\1\2", regex=True).str.strip(), errors="coerce")
+    sign = s.str.contains(NEGATIVE_VALUE_RE, regex=True, na=False).map({True: -1.0, False: 1.0})
+    if "単位" in df.columns:
+        mult = df["単位"].map(UNIT_MAP).fillna(1).astype(float)
+    else:
+        mult = 1.0
+
+    df[VALUE_NUM_COL] = (num * sign * mult).where(~missing)
+    return df
+
+
+def add_normalized_values(df):
+    """値の数値化列を追加する (polars優先、なければpandas)"""
+    if HAS_POLARS:
+        return add_normalized_values_polars(df)
+    else:
+        return add_normalized_values_pandas(df)
+
+
+def add_segment_flag_polars(df: pl.DataFrame) -> pl.DataFrame:
+    """
+    セグメントMemberの行（Memberを含むが、NonConsolidatedMember/ConsolidatedMemberでない）を示す列を追加する。
+    コンテキストIDだけで決まるので、抽出のたびに文字列を走査しないよう1回で作る。
+    """
+    if "コンテキストID" not in df.columns:
+        return df.with_columns(pl.lit(False).alias(SEGMENT_COL))
+    ctx = pl.col("コンテキストID")
+    return df.with_columns(
+        (
+            ctx.str.contains("Member", literal=True)
+            & ~ctx.str.contains("NonConsolidatedMember", literal=True)
+            & ~ctx.str.contains("ConsolidatedMember", literal=True)
+        ).fill_null(False).alias(SEGMENT_COL)  # コンテキストIDが空の行はセグメント扱いしない
+    )
+
+
+def add_segment_flag_pandas(df):
+    """add_segment_flag_polars の pandas 版"""
+    df = df.copy()
+    if "コンテキストID" not in df.columns:
+        df[SEGMENT_COL] = False
+        return df
+    ctx = df["コンテキストID"]
+    df[SEGMENT_COL] = (
+        ctx.str.contains("Member", na=False, regex=False)
+        & ~ctx.str.contains("NonConsolidatedMember", na=False, regex=False)
+        & ~ctx.str.contains("ConsolidatedMember", na=False, regex=False)
+    )
+    return df
+
+
+def add_segment_flag(df):
+    """セグメントMember判定列を追加する (polars優先、なければpandas)"""
+    if HAS_POLARS:
+        return add_segment_flag_polars(df)
+    else:
+        return add_segment_flag_pandas(df)
 
 
 def extract_fiscal_year(date_str: str) -> Optional[int]:
@@ -263,7 +379,7 @@ def extract_fiscal_year(date_str: str) -> Optional[int]:
         return None
     try:
         # YYYY-MM-DD or YYYY/MM/DD 形式を想定
-        match = re.match(r"(\d{4})[-/](\d{2})[-/](\d{2})", str(date_str))
+        match = _DATE_RE.match(str(date_str))
         if match:
             return int(match.group(1))
     except (ValueError, TypeError):
@@ -289,92 +405,161 @@ def has_ifrs_or_usgaap(element_id: str) -> bool:
 # =============================================================================
 # TSV読み込み関連
 # =============================================================================
-def read_tsv_polars(tsv_path: Path) -> pl.DataFrame:
-    """polarsでTSVを読み込む"""
-    return pl.read_csv(
-        tsv_path,
-        separator="\t",
-        encoding="utf-16",
-        truncate_ragged_lines=True,
-        ignore_errors=True,
-        infer_schema_length=0,  # 全列を文字列として読み込む
-    )
+def _sha1(s: str) -> str:
+    return hashlib.sha1(s.encode("utf-8")).hexdigest()
+
+
+def _cache_path(cache_dir: Path, tsv_path: Path, suffix: str) -> Path:
+    # TSVごとのディレクトリに、TSVの更新時刻・サイズとこのスクリプトの更新時刻をキーにしたファイルを置く
+    # （どれか変われば作り直し。読み込み方を変えたときも古いキャッシュは使わない）
+    resolved = tsv_path.resolve()
+    st = resolved.stat()
+    version = f"{st.st_mtime_ns}|{st.st_size}|{_SCRIPT_MTIME}"
+    return cache_dir / _sha1(str(resolved)) / f"{_sha1(version)}{suffix}"
+
+
+def _write_cache(cache_path: Path, data: bytes) -> None:
+    # 一時ファイルに書いてから置き換える（並列実行中に途中のファイルを読ませない）
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = cache_path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, cache_path)
+    # 同じTSVの古いキャッシュ（再ダウンロード前・スクリプト変更前のもの）を消す
+    with os.scandir(cache_path.parent) as it:
+        stale = [e.path for e in it if e.name != cache_path.name and not e.name.endswith(".tmp")]
+    for path in stale:
+        try:
+            os.remove(path)
+        except FileNotFoundError:  # 別プロセスが先に消した
+            pass
 
 
-def read_tsv_pandas(tsv_path: Path):
-    """pandasでTSVを読み込む"""
+def utf8_tsv_path(tsv_path: Path) -> Path:
+    """
+    TSV (UTF-16) をUTF-8に変換したキャッシュのパスを返す。無ければ作る（pandas 用）。
+    DEIスキャンと抽出で同じTSVを2回読むので、1回目で変換しておけば2回目以降は変換が要らない。
+    """
+    cache_path = _cache_path(UTF8_CACHE_DIR, tsv_path, ".tsv")
+    if not cache_path.exists():
+        _write_cache(cache_path, tsv_path.read_bytes().decode("utf-16").encode("utf-8"))
+    return cache_path
+
+
+def parquet_tsv_path(tsv_path: Path) -> Path:
+    """
+    TSV (UTF-16) を全列文字列のまま parquet にしたキャッシュのパスを返す。無ければ作る。
+    UTF-16 のデコードとTSVのパースは1回だけで、以降は必要な列だけを parquet から読む。
+    """
+    cache_path = _cache_path(PARQUET_CACHE_DIR, tsv_path, ".parquet")
+    if not cache_path.exists():
+        df = pl.read_csv(
+            tsv_path,
+            separator="\t",
+            encoding="utf-16",
+            truncate_ragged_lines=True,
+            ignore_errors=True,
+            infer_schema_length=0,  # 全列を文字列として読み込む
+        )
+        buf = io.BytesIO()
+        df.write_parquet(buf)
+        _write_cache(cache_path, buf.getvalue())
+    return cache_path
+
+
+def read_tsv_polars(tsv_path: Path, columns: Optional[List[str]] = None) -> pl.DataFrame:
+    """polarsでTSVを読み込む（columns 指定時はその列だけ。TSVに無い列は読まない）"""
+    path = parquet_tsv_path(tsv_path)
+    if columns is not None:
+        schema = pl.read_parquet_schema(path)
+        columns = [c for c in columns if c in schema]
+    return pl.read_parquet(path, columns=columns)
+
+
+def read_tsv_pandas(tsv_path: Path, columns: Optional[List[str]] = None):
+    """pandasでTSVを読み込む（columns 指定時はその列だけ。TSVに無い列は読まない）"""
     return pd.read_csv(
-        tsv_path,
+        utf8_tsv_path(tsv_path),
         sep="\t",
-        encoding="utf-16",
+        encoding="utf-8",
+        usecols=None if columns is None else (lambda c: c in columns),
         on_bad_lines="skip",
     )
 
 
-def read_tsv(tsv_path: Path):
+def read_tsv(tsv_path: Path, columns: Optional[List[str]] = None):
     """TSVを読み込む (polars優先、なければpandas)"""
     if HAS_POLARS:
-        return read_tsv_polars(tsv_path)
+        return read_tsv_polars(tsv_path, columns)
     else:
-        return read_tsv_pandas(tsv_path)
+        return read_tsv_pandas(tsv_path, columns)
 
 
 def read_tsv_dei_only(tsv_path: Path) -> Optional[TSVMetadata]:
     """
     TSVからDEI情報のみを高速に取得する。
-    必要な列だけ読み、DEI行のみフィルタ。
+    結果は DEI_CACHE_DIR に保存し、2回目以降はTSVを読まずに返す。
+    """
+    try:
+        cache_path = _cache_path(DEI_CACHE_DIR, tsv_path, ".pkl")
+    except OSError as e:
+        warnings.warn(f"Failed to read DEI from {tsv_path}: {e}")
+        return None
+    # クラスごと pickle すると __main__ として実行したときに別プロセスから読めないので、dict で持つ
+    if cache_path.exists():
+        fields_ = pickle.loads(cache_path.read_bytes())
+        fields_["tsv_path"] = tsv_path  # 同じファイルを別の書き方のパスで渡されても呼び出し側に合わせる
+        return TSVMetadata(**fields_)
+    
+    meta = _read_tsv_dei_only(tsv_path)
+    if meta is not None:  # 読めなかったものは残さない（次回また試す）
+        _write_cache(cache_path, pickle.dumps(asdict(meta), protocol=pickle.HIGHEST_PROTOCOL))
+    return meta
+
+
+def _read_tsv_dei_only(tsv_path: Path) -> Optional[TSVMetadata]:
+    """
+    必要な列だけ読み、DEI行のみフィルタしてメタデータを作る。
     """
     try:
         if HAS_POLARS:
             # polarsで必要な列のみ読み込み（全て文字列として）
-            df = pl.read_csv(
-                tsv_path,
-                separator="\t",
-                encoding="utf-16",
-                truncate_ragged_lines=True,
-                ignore_errors=True,
-                columns=["要素ID", "値"],
-                infer_schema_length=0,  # 全列を文字列として読み込む
-            )
+            df = read_tsv_polars(tsv_path, ["要素ID", "値"])
             
-            # IFRS/US-GAAP含むか確認
+            # IFRS/US-GAAP含むか確認（小文字化した列を作らず、両方の接頭辞を1回の走査で探す）
             has_ifrs = False
             if "要素ID" in df.columns:
-                elem_col = df["要素ID"].cast(pl.Utf8)
-                ifrs_check = elem_col.str.to_lowercase()
-                has_ifrs = (
-                    ifrs_check.str.contains("ifrs-full:").any()
-                    or ifrs_check.str.contains("us-gaap:").any()
-                )
+                has_ifrs = df.select(
+                    pl.col("要素ID")
+                    .str.contains_any(["ifrs-full:", "us-gaap:"], ascii_case_insensitive=True)
+                    .any()
+                ).item()
             
             # DEI行のみフィルタ
-            dei_df = df.filter(pl.col("要素ID").str.contains("jpdei_cor:|jpcrp_cor:"))
+            dei_df = df.filter(pl.col("要素ID").str.contains_any(["jpdei_cor:", "jpcrp_cor:"]))
             
-            # DEI値を辞書化
-            dei_dict = {}
-            for row in dei_df.iter_rows(named=True):
-                elem_id = row["要素ID"]
-                val = row["値"]
-                if elem_id:
-                    dei_dict[elem_id] = val
+            # DEI値を辞書化（行ごとの dict を作らず列のリストから。要素IDが null の行はフィルタで落ちている）
+            dei_dict = dict(zip(dei_df["要素ID"].to_list(), dei_df["値"].to_list()))
         else:
             # pandas fallback
             df = pd.read_csv(
-                tsv_path,
+                utf8_tsv_path(tsv_path),
                 sep="\t",
-                encoding="utf-16",
+                encoding="utf-8",
                 usecols=["要素ID", "値"],
                 on_bad_lines="skip",
             )
             
             # IFRS/US-GAAP含むか
             has_ifrs = (
-                df["要素ID"].str.lower().str.contains("ifrs-full:", na=False).any()
-                or df["要素ID"].str.lower().str.contains("us-gaap:", na=False).any()
+                df["要素ID"].str.lower().str.contains("ifrs-full:", na=False, regex=False).any()
+                or df["要素ID"].str.lower().str.contains("us-gaap:", na=False, regex=False).any()
             )
             
             # DEI行のみ
-            dei_df = df[df["要素ID"].str.contains("jpdei_cor:|jpcrp_cor:", na=False, regex=True)]
+            dei_df = df[
+                df["要素ID"].str.contains("jpdei_cor:", na=False, regex=False)
+                | df["要素ID"].str.contains("jpcrp_cor:", na=False, regex=False)
+            ]
             dei_dict = dict(zip(dei_df["要素ID"], dei_df["値"]))
         
         # メタデータ構築
@@ -422,13 +607,13 @@ def select_best_tsv(
     if len(metas) == 1:
         return metas[0], duplicate_logs
     
-    # submit_datetimeでソート (降順)
-    metas_with_dt = [(m, m.submit_datetime or "") for m in metas]
-    metas_with_dt.sort(key=lambda x: (x[1], str(x[0].tsv_path)), reverse=True)
-    
-    chosen = metas_with_dt[0][0]
+    # submit_datetime → ファイル名の順で最大のものを採用（並べ替えは不要なので max で1回走査）
+    chosen = max(metas, key=lambda m: (m.submit_datetime or "", str(m.tsv_path)))
     
-    for m, _ in metas_with_dt[1:]:
+    # 採用しなかったものは元の順のまま記録
+    for m in metas:
+        if m is chosen:
+            continue
         duplicate_logs.append(DuplicateLog(
             edinet_code=edinet_code,
             fiscal_year=fiscal_year,
@@ -441,128 +626,52 @@ def select_best_tsv(
     return chosen, duplicate_logs
 
 
-def extract_value_with_fallback(
-    df,
-    element_ids: List[str],
-    relative_year: str,
-    period_type: str,
-    consolidated: str = "連結",
-    prefix: str = "jppfs_cor:",
-) -> Optional[float]:
+def build_value_index(df) -> Dict[Tuple[str, str, str, str], float]:
     """
-    複数の要素IDからfallbackで値を取得。
-    セグメント混入対策：
-    - コンテキストIDにMemberを含む行を除外
-    - 複数行あれば最大値を採用
+    (要素ID, 相対年度, 期間・時点, 連結・個別) -> 数値化済みの値の最大 の辞書を1回で作る。
+    セグメント混入対策としてコンテキストIDにMemberを含む行は除外し、複数行あれば最大値を採る。
+    値が1つも数値にならないキーは載せない。
     """
     if HAS_POLARS:
-        return _extract_value_polars(df, element_ids, relative_year, period_type, consolidated, prefix)
+        return _build_value_index_polars(df)
     else:
-        return _extract_value_pandas(df, element_ids, relative_year, period_type, consolidated, prefix)
+        return _build_value_index_pandas(df)
+
+
+def _build_value_index_polars(df: pl.DataFrame) -> Dict[Tuple[str, str, str, str], float]:
+    """polars版の索引作成"""
+    if not set(INDEX_KEYS).issubset(df.columns):
+        return {}
+    if VALUE_NUM_COL not in df.columns:
+        df = add_normalized_values_polars(df)
+    if SEGMENT_COL not in df.columns:
+        df = add_segment_flag_polars(df)
+    
+    # セグメントMember除外 (NonConsolidatedMember/ConsolidatedMemberは除外しない)
+    agg = (
+        df.filter(~pl.col(SEGMENT_COL))
+        .group_by(INDEX_KEYS)
+        .agg(pl.col(VALUE_NUM_COL).max())
+        .drop_nulls(VALUE_NUM_COL)
+    )
+    return dict(zip(agg.select(INDEX_KEYS).iter_rows(), agg[VALUE_NUM_COL].to_list()))
 
 
-def _extract_value_polars(
-    df: pl.DataFrame,
-    element_ids: List[str],
-    relative_year: str,
-    period_type: str,
-    consolidated: str,
-    prefix: str,
-) -> Optional[float]:
-    """polars版の値抽出"""
-    for elem_id in element_ids:
-        full_elem_id = f"{prefix}{elem_id}"
-        
-        try:
-            # フィルタ
-            filtered = df.filter(
-                (pl.col("要素ID") == full_elem_id)
-                & (pl.col("相対年度") == relative_year)
-                & (pl.col("期間・時点") == period_type)
-                & (pl.col("連結・個別") == consolidated)
-            )
-            
-            # セグメントMember除外 (NonConsolidatedMember/ConsolidatedMemberは除外しない)
-            if "コンテキストID" in df.columns:
-                # Memberを含むが、NonConsolidatedMember/ConsolidatedMemberでない場合のみ除外
-                filtered = filtered.filter(
-                    ~(
-                        pl.col("コンテキストID").str.contains("Member")
-                        & ~pl.col("コンテキストID").str.contains("NonConsolidatedMember")
-                        & ~pl.col("コンテキストID").str.contains("ConsolidatedMember")
-                    )
-                )
-            
-            if filtered.height == 0:
-                continue
-            
-            # 値を数値化して最大を取得
-            values = []
-            for row in filtered.iter_rows(named=True):
-                val = normalize_value(row.get("値", ""), row.get("単位", "円"))
-                if val is not None:
-                    values.append(val)
-            
-            if values:
-                return max(values)
-        
-        except Exception:
-            continue
+def _build_value_index_pandas(df) -> Dict[Tuple[str, str, str, str], float]:
+    """pandas版の索引作成"""
+    if not set(INDEX_KEYS).issubset(df.columns):
+        return {}
+    if VALUE_NUM_COL not in df.columns:
+        df = add_normalized_values_pandas(df)
+    if SEGMENT_COL not in df.columns:
+        df = add_segment_flag_pandas(df)
     
-    return None
+    agg = df[~df[SEGMENT_COL]].groupby(INDEX_KEYS)[VALUE_NUM_COL].max()
+    return {k: float(v) for k, v in agg.items() if pd.notna(v)}
 
 
-def _extract_value_pandas(
-    df,
-    element_ids: List[str],
-    relative_year: str,
-    period_type: str,
-    consolidated: str,
-    prefix: str,
-) -> Optional[float]:
-    """pandas版の値抽出"""
-    for elem_id in element_ids:
-        full_elem_id = f"{prefix}{elem_id}"
-        
-        try:
-            # フィルタ
-            mask = (
-                (df["要素ID"] == full_elem_id)
-                & (df["相対年度"] == relative_year)
-                & (df["期間・時点"] == period_type)
-                & (df["連結・個別"] == consolidated)
-            )
-            filtered = df[mask]
-            
-            # セグメントMember除外 (NonConsolidatedMember/ConsolidatedMemberは除外しない)
-            if "コンテキストID" in df.columns:
-                # Memberを含むが、NonConsolidatedMember/ConsolidatedMemberでない場合のみ除外
-                mask_member = filtered["コンテキストID"].str.contains("Member", na=False)
-                mask_non_cons = filtered["コンテキストID"].str.contains("NonConsolidatedMember", na=False)
-                mask_cons = filtered["コンテキストID"].str.contains("ConsolidatedMember", na=False)
-                filtered = filtered[~(mask_member & ~mask_non_cons & ~mask_cons)]
-            
-            if len(filtered) == 0:
-                continue
-            
-            # 値を数値化して最大を取得
-            values = []
-            for _, row in filtered.iterrows():
-                val = normalize_value(row.get("値", ""), row.get("単位", "円"))
-                if val is not None:
-                    values.append(val)
-            
-            if values:
-                return max(values)
-        
-        except Exception:
-            continue
-    
-    return None
-
-
-def extract_value_with_fallback_and_eid(
-    df,
+def lookup_value_with_fallback(
+    index: Dict[Tuple[str, str, str, str], float],
     element_ids: List[str],
     relative_year: str,
     period_type: str,
@@ -570,103 +679,13 @@ def extract_value_with_fallback_and_eid(
     prefix: str = "jppfs_cor:",
 ) -> Tuple[Optional[float], Optional[str]]:
     """
-    複数の要素IDからfallbackで値を取得し、採用した要素名も返す。
+    build_value_index の索引から、複数の要素IDを順に引いて最初に見つかった値と要素名を返す。
     """
-    if HAS_POLARS:
-        return _extract_value_polars_with_eid(df, element_ids, relative_year, period_type, consolidated, prefix)
-    else:
-        return _extract_value_pandas_with_eid(df, element_ids, relative_year, period_type, consolidated, prefix)
-
-
-def _extract_value_polars_with_eid(
-    df: pl.DataFrame,
-    element_ids: List[str],
-    relative_year: str,
-    period_type: str,
-    consolidated: str,
-    prefix: str,
-) -> Tuple[Optional[float], Optional[str]]:
-    """polars版の値抽出（採用要素名つき）"""
-    for elem_id in element_ids:
-        full_elem_id = f"{prefix}{elem_id}"
-        
-        try:
-            filtered = df.filter(
-                (pl.col("要素ID") == full_elem_id)
-                & (pl.col("相対年度") == relative_year)
-                & (pl.col("期間・時点") == period_type)
-                & (pl.col("連結・個別") == consolidated)
-            )
-            
-            if "コンテキストID" in df.columns:
-                filtered = filtered.filter(
-                    ~(
-                        pl.col("コンテキストID").str.contains("Member")
-                        & ~pl.col("コンテキストID").str.contains("NonConsolidatedMember")
-                        & ~pl.col("コンテキストID").str.contains("ConsolidatedMember")
-                    )
-                )
-            
-            if filtered.height == 0:
-                continue
-            
-            values = []
-            for row in filtered.iter_rows(named=True):
-                val = normalize_value(row.get("値", ""), row.get("単位", "円"))
-                if val is not None:
-                    values.append(val)
-            
-            if values:
-                return max(values), elem_id
-        
-        except Exception:
-            continue
-    
-    return None, None
-
-
-def _extract_value_pandas_with_eid(
-    df,
-    element_ids: List[str],
-    relative_year: str,
-    period_type: str,
-    consolidated: str,
-    prefix: str,
-) -> Tuple[Optional[float], Optional[str]]:
-    """pandas版の値抽出（採用要素名つき）"""
-    for elem_id in element_ids:
-        full_elem_id = f"{prefix}{elem_id}"
-        
-        try:
-            mask = (
-                (df["要素ID"] == full_elem_id)
-                & (df["相対年度"] == relative_year)
-                & (df["期間・時点"] == period_type)
-                & (df["連結・個別"] == consolidated)
-            )
-            filtered = df[mask]
-            
-            if "コンテキストID" in df.columns:
-                mask_member = filtered["コンテキストID"].str.contains("Member", na=False)
-                mask_non_cons = filtered["コンテキストID"].str.contains("NonConsolidatedMember", na=False)
-                mask_cons = filtered["コンテキストID"].str.contains("ConsolidatedMember", na=False)
-                filtered = filtered[~(mask_member & ~mask_non_cons & ~mask_cons)]
-            
-            if len(filtered) == 0:
-                continue
-            
-            values = []
-            for _, row in filtered.iterrows():
-                val = normalize_value(row.get("値", ""), row.get("単位", "円"))
-                if val is not None:
-                    values.append(val)
-            
-            if values:
-                return max(values), elem_id
-        
-        except Exception:
-            continue
-    
+    full_ids = [f"{prefix}{e}" for e in element_ids]
+    for elem_id, full_elem_id in zip(element_ids, full_ids):
+        value = index.get((full_elem_id, relative_year, period_type, consolidated))
+        if value is not None:
+            return value, elem_id
     return None, None
 
 
@@ -678,42 +697,27 @@ def check_has_consolidated_data(df, element_ids: List[str] = None) -> bool:
     if element_ids is None:
         element_ids = ELEMENT_NET_SALES  # デフォルトは売上高で判定
     
+    full_ids = [f"jppfs_cor:{e}" for e in element_ids]
+    
+    # 連結・当期の行に主要項目があるかを1回のフィルタで確認
     if HAS_POLARS:
         try:
-            # 連結の行が存在するかチェック
-            consolidated_rows = df.filter(
+            return df.filter(
                 (pl.col("連結・個別") == "連結")
-            )
-            if consolidated_rows.height == 0:
-                return False
-            
-            # 主要項目が連結で取れるかチェック
-            for elem_id in element_ids:
-                full_elem_id = f"jppfs_cor:{elem_id}"
-                matched = consolidated_rows.filter(
-                    (pl.col("要素ID") == full_elem_id)
-                    & (pl.col("相対年度") == "当期")
-                )
-                if matched.height > 0:
-                    return True
-            return False
+                & (pl.col("相対年度") == "当期")
+                & pl.col("要素ID").is_in(full_ids)
+            ).height > 0
         except Exception:
             return False
     else:
         try:
-            consolidated_rows = df[df["連結・個別"] == "連結"]
-            if len(consolidated_rows) == 0:
-                return False
-            
-            for elem_id in element_ids:
-                full_elem_id = f"jppfs_cor:{elem_id}"
-                matched = consolidated_rows[
-                    (consolidated_rows["要素ID"] == full_elem_id)
-                    & (consolidated_rows["相対年度"] == "当期")
-                ]
-                if len(matched) > 0:
-                    return True
-            return False
+            return bool(
+                (
+                    (df["連結・個別"] == "連結")
+                    & (df["相対年度"] == "当期")
+                    & df["要素ID"].isin(full_ids)
+                ).any()
+            )
         except Exception:
             return False
 
@@ -731,10 +735,23 @@ def extract_mj_data_from_tsv(
     missing_reasons = []
     
     try:
-        df = read_tsv(tsv_path)
+        df = read_tsv(tsv_path, MJ_COLUMNS)
     except Exception as e:
         return None, [f"TSV read error: {e}"], None
     
+    # 以降の判定・抽出は MJ_ELEMENT_IDS の行しか見ないので先に絞り、
+    # 値の数値化も抽出ごとではなく、ここで列として1回だけ行う
+    if "要素ID" in df.columns:
+        if HAS_POLARS:
+            df = df.filter(pl.col("要素ID").is_in(MJ_ELEMENT_IDS))
+        else:
+            df = df[df["要素ID"].isin(MJ_ELEMENT_IDS)]
+    df = add_normalized_values(df)
+    df = add_segment_flag(df)
+    
+    # 値の取り出しは索引から引く（項目ごとに DataFrame をフィルタし直さない）
+    index = build_value_index(df)
+    
     # 連結データがあるかチェック
     has_consolidated = check_has_consolidated_data(df, ELEMENT_NET_SALES)
     
@@ -762,43 +779,43 @@ def extract_mj_data_from_tsv(
     
     # 期間項目 (期間・時点=="期間")
     # 売上高: 当期
-    mj.rev_t = extract_value_with_fallback(df, ELEMENT_NET_SALES, "当期", "期間", consolidated_type)
+    mj.rev_t = lookup_value_with_fallback(index, ELEMENT_NET_SALES, "当期", "期間", consolidated_type)[0]
     if mj.rev_t is None:
         missing_reasons.append(f"rev_t (NetSales 当期 {consolidated_type})")
     
     # 売上高: 前期
-    mj.rev_t1 = extract_value_with_fallback(df, ELEMENT_NET_SALES, "前期", "期間", consolidated_type)
+    mj.rev_t1 = lookup_value_with_fallback(index, ELEMENT_NET_SALES, "前期", "期間", consolidated_type)[0]
     if mj.rev_t1 is None:
         missing_reasons.append(f"rev_t1 (NetSales 前期 {consolidated_type})")
     
     # 当期純利益: 当期
-    mj.ni_t = extract_value_with_fallback(df, ELEMENT_PROFIT_LOSS, "当期", "期間", consolidated_type)
+    mj.ni_t = lookup_value_with_fallback(index, ELEMENT_PROFIT_LOSS, "当期", "期間", consolidated_type)[0]
     if mj.ni_t is None:
         missing_reasons.append(f"ni_t (ProfitLoss 当期 {consolidated_type})")
     
     # 営業CF: 当期
-    mj.cfo_t = extract_value_with_fallback(df, ELEMENT_OPERATING_CF, "当期", "期間", consolidated_type)
+    mj.cfo_t = lookup_value_with_fallback(index, ELEMENT_OPERATING_CF, "当期", "期間", consolidated_type)[0]
     if mj.cfo_t is None:
         missing_reasons.append(f"cfo_t (OperatingCF 当期 {consolidated_type})")
     
     # 時点項目 (期間・時点=="時点")
     # 総資産: 前期末
-    mj.assets_prev_end = extract_value_with_fallback(df, ELEMENT_ASSETS, "前期末", "時点", consolidated_type)
+    mj.assets_prev_end = lookup_value_with_fallback(index, ELEMENT_ASSETS, "前期末", "時点", consolidated_type)[0]
     if mj.assets_prev_end is None:
         missing_reasons.append(f"assets_prev_end (Assets 前期末 {consolidated_type})")
     
     # 売上債権(REC): 当期末/前期末
-    rec_base_t, rec_base_eid_t = extract_value_with_fallback_and_eid(
-        df, ELEMENT_REC_BASE, "当期末", "時点", consolidated_type
+    rec_base_t, rec_base_eid_t = lookup_value_with_fallback(
+        index, ELEMENT_REC_BASE, "当期末", "時点", consolidated_type
     )
-    rec_eclaims_t, rec_eclaims_eid_t = extract_value_with_fallback_and_eid(
-        df, ELEMENT_ECLAIMS, "当期末", "時点", consolidated_type
+    rec_eclaims_t, rec_eclaims_eid_t = lookup_value_with_fallback(
+        index, ELEMENT_ECLAIMS, "当期末", "時点", consolidated_type
     )
-    rec_base_t1, rec_base_eid_t1 = extract_value_with_fallback_and_eid(
-        df, ELEMENT_REC_BASE, "前期末", "時点", consolidated_type
+    rec_base_t1, rec_base_eid_t1 = lookup_value_with_fallback(
+        index, ELEMENT_REC_BASE, "前期末", "時点", consolidated_type
     )
-    rec_eclaims_t1, rec_eclaims_eid_t1 = extract_value_with_fallback_and_eid(
-        df, ELEMENT_ECLAIMS, "前期末", "時点", consolidated_type
+    rec_eclaims_t1, rec_eclaims_eid_t1 = lookup_value_with_fallback(
+        index, ELEMENT_ECLAIMS, "前期末", "時点", consolidated_type
     )
     
     def add_eclaims(base: Optional[float], eclaims: Optional[float]) -> Optional[float]:
@@ -822,7 +839,7 @@ def extract_mj_data_from_tsv(
         missing_reasons.append(f"ar_end_t1 (REC base 前期末 {consolidated_type})")
     
     # PPE: 当期末
-    mj.ppe_end_t = extract_value_with_fallback(df, ELEMENT_PPE, "当期末", "時点", consolidated_type)
+    mj.ppe_end_t = lookup_value_with_fallback(index, ELEMENT_PPE, "当期末", "時点", consolidated_type)[0]
     if mj.ppe_end_t is None:
         missing_reasons.append(f"ppe_end_t (PPE 当期末 {consolidated_type})")
     
@@ -867,12 +884,57 @@ def extract_mj_data_from_tsv(
 # =============================================================================
 # メイン処理
 # =============================================================================
+def list_tsvs(company_dir: Path) -> List[Path]:
+    """企業ディレクトリ直下のTSV（glob の fnmatch を通さず scandir 1回で拾う。ディレクトリ順）"""
+    if not company_dir.exists():
+        return []
+    with os.scandir(company_dir) as it:
+        return [Path(e.path) for e in it if e.name.endswith(".tsv") and e.is_file()]
+
+
+def scan_dei_all(
+    annual_dir: Path,
+    edinet_codes: List[str],
+    max_workers: int,
+) -> Dict[str, List[Optional[TSVMetadata]]]:
+    """
+    全社分のTSVのDEIを、ファイル単位でまとめてプロセス並列に読む。
+    戻り: edinet_code -> read_tsv_dei_only の結果 (list_tsvs の順、読めなかったものは None)
+    """
+    paths_by_code: Dict[str, List[Path]] = {code: list_tsvs(annual_dir / code) for code in edinet_codes}
+    all_paths = [p for paths in paths_by_code.values() for p in paths]
+    
+    if max_workers <= 1 or len(all_paths) <= 1:
+        metas = [read_tsv_dei_only(p) for p in tqdm(all_paths, desc="DEI scan")]
+    else:
+        # プロセスごとの polars スレッド数を絞ってコア数の取り合いを避ける（子プロセスの import 前に設定）
+        os.environ.setdefault("POLARS_MAX_THREADS", "2")
+        # polars のスレッドと fork の相性を避けて spawn
+        ctx = multiprocessing.get_context("spawn")
+        chunksize = max(1, min(32, len(all_paths) // (max_workers * 4)))
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=ctx) as ex:
+            metas = list(tqdm(
+                ex.map(read_tsv_dei_only, all_paths, chunksize=chunksize),
+                total=len(all_paths),
+                desc="DEI scan",
+            ))
+    
+    result: Dict[str, List[Optional[TSVMetadata]]] = {}
+    pos = 0
+    for code, paths in paths_by_code.items():
+        result[code] = metas[pos:pos + len(paths)]
+        pos += len(paths)
+    return result
+
+
 def scan_tsvs_for_company(
     company_dir: Path,
     edinet_code: str,
+    dei_metas: Optional[List[Optional[TSVMetadata]]] = None,
 ) -> Tuple[List[TSVMetadata], Dict[int, str]]:
     """
     企業ディレクトリ内のTSVをスキャンしてメタデータを取得。
+    dei_metas があれば（scan_dei_all で読み済み）、TSVを読み直さずにそれを使う。
     Returns:
         metas: Japan GAAPのTSVメタデータリスト
         non_japan_gaap_by_year: 年度ごとの非Japan GAAP会計基準 (e.g., {2024: "IFRS"})
@@ -883,8 +945,10 @@ def scan_tsvs_for_company(
     if not company_dir.exists():
         return metas, non_japan_gaap_by_year
     
-    for tsv_path in company_dir.glob("*.tsv"):
-        meta = read_tsv_dei_only(tsv_path)
+    if dei_metas is None:
+        dei_metas = [read_tsv_dei_only(tsv_path) for tsv_path in list_tsvs(company_dir)]
+    
+    for meta in dei_metas:
         if meta is None:
             continue
         
@@ -921,6 +985,7 @@ def process_company(
     edinet_code: str,
     company_info: Dict[str, Any],
     annual_dir: Path,
+    dei_metas: Optional[List[Optional[TSVMetadata]]] = None,
 ) -> Tuple[List[MJInput], List[MissingLog], List[DuplicateLog], List[RecDebugLog]]:
     """1社分の処理"""
     mj_inputs = []
@@ -931,15 +996,11 @@ def process_company(
     company_dir = annual_dir / edinet_code
     
     # Phase A: DEIスキャンで採用TSVを決定
-    metas, non_japan_gaap_by_year = scan_tsvs_for_company(company_dir, edinet_code)
+    metas, non_japan_gaap_by_year = scan_tsvs_for_company(company_dir, edinet_code, dei_metas)
     
-    # fiscal_yearごとにグループ化して重複処理
-    by_year: Dict[int, List[TSVMetadata]] = {}
-    for m in metas:
-        fy = m.fiscal_year
-        if fy not in by_year:
-            by_year[fy] = []
-        by_year[fy].append(m)
+    # fiscal_yearごとにグループ化して重複処理（安定ソートなので年度内の順は元のまま）
+    metas.sort(key=attrgetter("fiscal_year"))
+    by_year = {fy: list(g) for fy, g in itertools.groupby(metas, key=attrgetter("fiscal_year"))}
     
     # Phase B: 各年度について採用TSVから財務データ抽出
     for fy in range(FISCAL_YEAR_MIN, FISCAL_YEAR_MAX + 1):
@@ -997,6 +1058,15 @@ def process_company(
     return mj_inputs, missing_logs, duplicate_logs, rec_debug_logs
 
 
+def _process_one(
+    company_info: Dict[str, Any],
+    annual_dir: str,
+    dei_metas: Optional[List[Optional[TSVMetadata]]],
+) -> Tuple[List[MJInput], List[MissingLog], List[DuplicateLog], List[RecDebugLog]]:
+    # プロセスプールから呼ぶので module レベルに置く（ローカル関数は pickle できない）
+    return process_company(company_info["edinet_code"], company_info, Path(annual_dir), dei_metas)
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="修正ジョーンズモデル用財務データ抽出"
@@ -1023,7 +1093,13 @@ def main():
         "--num_workers",
         type=int,
         default=4,
-        help="並列数",
+        help="会社ごとの処理のプロセス並列数 (1以下で並列化しない)",
+    )
+    parser.add_argument(
+        "--dei_workers",
+        type=int,
+        default=os.cpu_count(),
+        help="DEIスキャンのプロセス並列数 (1以下で並列化しない)",
     )
     
     args = parser.parse_args()
@@ -1037,8 +1113,21 @@ def main():
     
     # 対象企業読み込み
     print(f"Reading target companies from {target_path}...")
+    target_df = pl.read_csv(target_path) if HAS_POLARS else pd.read_csv(target_path)
+    print(f"Found {len(target_df)} target companies")
+    
+    # 除外業種をフィルタ（dict にする前に列でまとめて判定する。業種が空の会社は残す）
+    if EXCLUDE_INDUSTRIES and "industry" in target_df.columns:
+        original_count = len(target_df)
+        if HAS_POLARS:
+            target_df = target_df.filter(~pl.col("industry").is_in(EXCLUDE_INDUSTRIES).fill_null(False))
+        else:
+            target_df = target_df[~target_df["industry"].isin(EXCLUDE_INDUSTRIES)]
+        excluded_count = original_count - len(target_df)
+        print(f"Excluded {excluded_count} companies in excluded industries: {EXCLUDE_INDUSTRIES}")
+        print(f"Processing {len(target_df)} companies after filter")
+    
     if HAS_POLARS:
-        target_df = pl.read_csv(target_path)
         companies = [
             {
                 "edinet_code": row["edinet_code"],
@@ -1050,190 +1139,82 @@ def main():
             for row in target_df.iter_rows(named=True)
         ]
     else:
-        target_df = pd.read_csv(target_path)
         companies = target_df.to_dict(orient="records")
     
-    print(f"Found {len(companies)} target companies")
+    # Phase A (DEIスキャン) は全社分のTSVをまとめてプロセス並列で読む
+    print(f"Scanning DEI with {args.dei_workers} processes...")
+    dei_by_code = scan_dei_all(annual_dir, [c["edinet_code"] for c in companies], args.dei_workers)
     
-    # 除外業種をフィルタ
-    if EXCLUDE_INDUSTRIES:
-        original_count = len(companies)
-        companies = [c for c in companies if c.get("industry") not in EXCLUDE_INDUSTRIES]
-        excluded_count = original_count - len(companies)
-        print(f"Excluded {excluded_count} companies in excluded industries: {EXCLUDE_INDUSTRIES}")
-        print(f"Processing {len(companies)} companies after filter")
+    # 並列処理（TSVの読み込み・抽出は Python 側の処理が多く GIL で詰まるので、スレッドではなくプロセス）
+    print(f"Processing companies with {args.num_workers} processes...")
     
-    # 全結果格納用
-    all_mj_inputs: List[MJInput] = []
-    all_missing_logs: List[MissingLog] = []
-    all_duplicate_logs: List[DuplicateLog] = []
-    all_rec_debug_logs: List[RecDebugLog] = []
+    # 会社ごとの結果は会社の並び順の位置に置き、最後にまとめて連結する（並列でも出力順が変わらない）
+    results: List[Optional[Tuple[list, list, list, list]]] = [None] * len(companies)
     
-    # 並列処理
-    print(f"Processing companies with {args.num_workers} workers...")
+    def collect(i, get_result):
+        try:
+            results[i] = get_result()
+        except Exception as e:
+            warnings.warn(f"Error processing {companies[i]['edinet_code']}: {e}")
     
-    def process_one(company_info):
-        edinet_code = company_info["edinet_code"]
-        return process_company(edinet_code, company_info, annual_dir)
+    if args.num_workers <= 1 or len(companies) <= 1:
+        for i, c in enumerate(tqdm(companies, desc="Companies")):
+            collect(i, lambda: _process_one(c, str(annual_dir), dei_by_code.get(c["edinet_code"])))
+    else:
+        # scan_dei_all と同じく、polars のスレッド数を絞って spawn で起動する
+        os.environ.setdefault("POLARS_MAX_THREADS", "2")
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=args.num_workers, mp_context=ctx) as executor:
+            futures = {
+                executor.submit(_process_one, c, str(annual_dir), dei_by_code.get(c["edinet_code"])): i
+                for i, c in enumerate(companies)
+            }
+            
+            for future in tqdm(as_completed(futures), total=len(futures), desc="Companies"):
+                collect(futures[future], future.result)
     
-    with ThreadPoolExecutor(max_workers=args.num_workers) as executor:
-        futures = {
-            executor.submit(process_one, c): c["edinet_code"]
-            for c in companies
-        }
-        
-        for future in tqdm(as_completed(futures), total=len(futures), desc="Companies"):
-            try:
-                mj_inputs, missing, dups, rec_debugs = future.result()
-                all_mj_inputs.extend(mj_inputs)
-                all_missing_logs.extend(missing)
-                all_duplicate_logs.extend(dups)
-                all_rec_debug_logs.extend(rec_debugs)
-            except Exception as e:
-                edinet_code = futures[future]
-                warnings.warn(f"Error processing {edinet_code}: {e}")
+    done = [r for r in results if r is not None]
+    all_mj_inputs: List[MJInput] = list(itertools.chain.from_iterable(r[0] for r in done))
+    all_missing_logs: List[MissingLog] = list(itertools.chain.from_iterable(r[1] for r in done))
+    all_duplicate_logs: List[DuplicateLog] = list(itertools.chain.from_iterable(r[2] for r in done))
+    all_rec_debug_logs: List[RecDebugLog] = list(itertools.chain.from_iterable(r[3] for r in done))
     
     # 結果出力
     print(f"\nWriting results to {out_dir}...")
     
     # mj_inputs（完全ケースのみ）
-    mj_records = []
-    for mj in all_mj_inputs:
-        mj_records.append({
-            "edinet_code": mj.edinet_code,
-            "sec_code": mj.sec_code,
-            "company_name": mj.company_name,
-            "industry": mj.industry,
-            "market": mj.market,
-            "fiscal_year": mj.fiscal_year,
-            "period_end": mj.period_end,
-            "submit_datetime": mj.submit_datetime,
-            "doc_id": mj.doc_id,
-            "tsv_path": mj.tsv_path,
-            "is_consolidated": mj.is_consolidated,  # True=連結, False=個別
-            "assets_prev_end": mj.assets_prev_end,
-            "rev_t": mj.rev_t,
-            "rev_t1": mj.rev_t1,
-            "ar_end_t": mj.ar_end_t,
-            "ar_end_t1": mj.ar_end_t1,
-            "ar_end_t_no_e": mj.ar_end_t_no_e,
-            "ar_end_t1_no_e": mj.ar_end_t1_no_e,
-            "eclaims_end_t": mj.eclaims_end_t,
-            "eclaims_end_t1": mj.eclaims_end_t1,
-            "rec_rule": mj.rec_rule,
-            "rec_used_base_eid": mj.rec_used_base_eid,
-            "rec_used_eclaims_eid": mj.rec_used_eclaims_eid,
-            "ppe_end_t": mj.ppe_end_t,
-            "ni_t": mj.ni_t,
-            "cfo_t": mj.cfo_t,
-            "ta_t": mj.ta_t,
-            "d_rev": mj.d_rev,
-            "d_ar": mj.d_ar,
-        })
-    
+    # 行ごとの dict は作らず、列ごとのリストから DataFrame にする（列はデータクラスのフィールド順）
+    mj_cols = to_columns(all_mj_inputs, MJInput)
     if HAS_POLARS:
-        mj_df = pl.DataFrame(mj_records)
+        mj_df = pl.DataFrame(mj_cols)
         mj_df.write_csv(out_dir / "mj_inputs_2015_2024.csv")
         try:
             mj_df.write_parquet(out_dir / "mj_inputs_2015_2024.parquet")
         except Exception as e:
             warnings.warn(f"Could not write parquet: {e}")
     else:
-        mj_df = pd.DataFrame(mj_records)
+        mj_df = pd.DataFrame(mj_cols)
         mj_df.to_csv(out_dir / "mj_inputs_2015_2024.csv", index=False)
         try:
             mj_df.to_parquet(out_dir / "mj_inputs_2015_2024.parquet", index=False)
         except Exception:
             pass
     
-    print(f"  - mj_inputs: {len(mj_records)} records")
+    print(f"  - mj_inputs: {len(all_mj_inputs)} records")
     
-    # missing_log
-    missing_records = [
-        {
-            "edinet_code": m.edinet_code,
-            "fiscal_year": m.fiscal_year,
-            "tsv_path": m.tsv_path,
-            "missing_reason": m.missing_reason,
-        }
-        for m in all_missing_logs
-    ]
-    if HAS_POLARS:
-        pl.DataFrame(missing_records).write_csv(out_dir / "mj_missing_log.csv")
-    else:
-        pd.DataFrame(missing_records).to_csv(out_dir / "mj_missing_log.csv", index=False)
-    
-    print(f"  - missing_log: {len(missing_records)} records")
-    
-    # duplicates_log
-    dup_records = [
-        {
-            "edinet_code": d.edinet_code,
-            "fiscal_year": d.fiscal_year,
-            "chosen_tsv": d.chosen_tsv,
-            "chosen_submit_datetime": d.chosen_submit_datetime,
-            "skipped_tsv": d.skipped_tsv,
-            "skipped_reason": d.skipped_reason,
-        }
-        for d in all_duplicate_logs
-    ]
-    if HAS_POLARS:
-        pl.DataFrame(dup_records).write_csv(out_dir / "duplicates_log.csv")
-    else:
-        pd.DataFrame(dup_records).to_csv(out_dir / "duplicates_log.csv", index=False)
-    
-    print(f"  - duplicates_log: {len(dup_records)} records")
-    
-    # rec_debug_log
-    rec_debug_records = [
-        {
-            "edinet_code": r.edinet_code,
-            "fiscal_year": r.fiscal_year,
-            "tsv_path": r.tsv_path,
-            "is_consolidated": r.is_consolidated,
-            "rec_rule": r.rec_rule,
-            "rec_base_end_t": r.rec_base_end_t,
-            "rec_base_end_t1": r.rec_base_end_t1,
-            "rec_eclaims_end_t": r.rec_eclaims_end_t,
-            "rec_eclaims_end_t1": r.rec_eclaims_end_t1,
-            "rec_plus_e_end_t": r.rec_plus_e_end_t,
-            "rec_plus_e_end_t1": r.rec_plus_e_end_t1,
-            "rec_used_base_eid_end_t": r.rec_used_base_eid_end_t,
-            "rec_used_base_eid_end_t1": r.rec_used_base_eid_end_t1,
-            "rec_used_eclaims_eid_end_t": r.rec_used_eclaims_eid_end_t,
-            "rec_used_eclaims_eid_end_t1": r.rec_used_eclaims_eid_end_t1,
-        }
-        for r in all_rec_debug_logs
-    ]
-    rec_debug_columns = [
-        "edinet_code",
-        "fiscal_year",
-        "tsv_path",
-        "is_consolidated",
-        "rec_rule",
-        "rec_base_end_t",
-        "rec_base_end_t1",
-        "rec_eclaims_end_t",
-        "rec_eclaims_end_t1",
-        "rec_plus_e_end_t",
-        "rec_plus_e_end_t1",
-        "rec_used_base_eid_end_t",
-        "rec_used_base_eid_end_t1",
-        "rec_used_eclaims_eid_end_t",
-        "rec_used_eclaims_eid_end_t1",
-    ]
-    if HAS_POLARS:
-        if rec_debug_records:
-            pl.DataFrame(rec_debug_records).write_csv(out_dir / "rec_debug_log.csv")
-        else:
-            pl.DataFrame({c: [] for c in rec_debug_columns}).write_csv(out_dir / "rec_debug_log.csv")
-    else:
-        if rec_debug_records:
-            pd.DataFrame(rec_debug_records).to_csv(out_dir / "rec_debug_log.csv", index=False)
+    # 各ログ（0件でもヘッダは出す）
+    for name, filename, records, cls in (
+        ("missing_log", "mj_missing_log.csv", all_missing_logs, MissingLog),
+        ("duplicates_log", "duplicates_log.csv", all_duplicate_logs, DuplicateLog),
+        ("rec_debug_log", "rec_debug_log.csv", all_rec_debug_logs, RecDebugLog),
+    ):
+        cols = to_columns(records, cls)
+        if HAS_POLARS:
+            pl.DataFrame(cols).write_csv(out_dir / filename)
         else:
-            pd.DataFrame(columns=rec_debug_columns).to_csv(out_dir / "rec_debug_log.csv", index=False)
-    
-    print(f"  - rec_debug_log: {len(rec_debug_records)} records")
+            pd.DataFrame(cols).to_csv(out_dir / filename, index=False)
+        
+        print(f"  - {name}: {len(records)} records")
     
     print("\nDone!")
 
@@ -12,17 +12,16 @@ tsv_paths = [
 
 for tsv_path in tsv_paths:
     print(f"\n=== {Path(tsv_path).parent.name} / {Path(tsv_path).name} ===")
-    df = pl.read_csv(tsv_path, separator="\t", encoding="utf-16", 
-                     ignore_errors=True, truncate_ragged_lines=True, infer_schema_length=0)
+    # 使う列だけ読む（scan_csv は UTF-16 を読めないので read_csv の columns で絞る）
+    df = pl.read_csv(tsv_path, separator="\t", encoding="utf-16",
+                     ignore_errors=True, truncate_ragged_lines=True, infer_schema_length=0,
+                     columns=["要素ID", "項目名", "相対年度", "連結・個別"])
     
     # jppfs_cor で Receivable または 手形/債権/売掛 を含む
+    # 小文字化は1回だけにし、3語は1つの正規表現で1回の走査で探す
     ar_related = df.filter(
-        pl.col("要素ID").str.contains("jppfs_cor:") 
-        & (
-            pl.col("要素ID").str.to_lowercase().str.contains("receiv")
-            | pl.col("要素ID").str.to_lowercase().str.contains("note")
-            | pl.col("要素ID").str.to_lowercase().str.contains("electronic")
-        )
+        pl.col("要素ID").str.contains("jppfs_cor:", literal=True)
+        & pl.col("要素ID").str.to_lowercase().str.contains("receiv|note|electronic")
         & (pl.col("連結・個別").is_in(["連結", "個別"]))
         & (pl.col("相対年度").is_in(["当期末", "前期末"]))
     )
@@ -1,11 +1,13 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 """丹青社の古い年度のAR科目を確認"""
+import os
 import polars as pl
 from pathlib import Path
 
 base = Path(r"C:\dev\edinet2dataset\edinet_corpus\annual\E00208")
-tsvs = sorted(base.glob("*.tsv"))
+with os.scandir(base) as it:
+    tsvs = sorted(Path(e.path) for e in it if e.name.endswith(".tsv") and e.is_file())
 
 ELEMENT_AR = [
     "NotesAndAccountsReceivableTrade",
@@ -21,35 +23,33 @@ ELEMENT_AR = [
 print("=== E00208 AR availability by TSV ===\n")
 
 for tsv in tsvs[:3] + tsvs[-2:]:  # 古い3つ + 新しい2つ
-    df = pl.read_csv(tsv, separator="\t", encoding="utf-16", 
-                     ignore_errors=True, truncate_ragged_lines=True, infer_schema_length=0)
+    # 使う列だけ読む（scan_csv は UTF-16 を読めないので read_csv の columns で絞る）
+    df = pl.read_csv(tsv, separator="\t", encoding="utf-16",
+                     ignore_errors=True, truncate_ragged_lines=True, infer_schema_length=0,
+                     columns=["要素ID", "項目名", "値", "相対年度", "連結・個別"])
     
     # 会計年度取得
     fy_start = df.filter(pl.col("要素ID").str.contains("CurrentFiscalYearStartDateDEI"))
     fy = fy_start["値"][0][:4] if fy_start.height > 0 else "?"
     
     print(f"{tsv.name} (FY{fy}):")
+    # 当期末・連結の行は科目ごとに絞り直さず先に1回だけ取る
+    cur = df.filter((pl.col("相対年度") == "当期末") & (pl.col("連結・個別") == "連結"))
     found_any = False
     for elem in ELEMENT_AR:
         full_elem = f"jppfs_cor:{elem}"
-        matches = df.filter(
-            (pl.col("要素ID") == full_elem) 
-            & (pl.col("相対年度") == "当期末")
-            & (pl.col("連結・個別") == "連結")
-        )
+        matches = cur.filter(pl.col("要素ID") == full_elem)
         if matches.height > 0:
             print(f"  ✓ {elem}: {matches['値'][0]}")
             found_any = True
     if not found_any:
         print(f"  ✗ No AR elements found in 連結")
         # 代替を探す
-        all_ar = df.filter(
+        all_ar = cur.filter(
             pl.col("要素ID").str.contains("jppfs_cor:")
             & (pl.col("要素ID").str.to_lowercase().str.contains("receiv") | 
                pl.col("項目名").str.contains("売掛") |
                pl.col("項目名").str.contains("手形"))
-            & (pl.col("相対年度") == "当期末")
-            & (pl.col("連結・個別") == "連結")
         )
         if all_ar.height > 0:
             for row in all_ar.iter_rows(named=True):
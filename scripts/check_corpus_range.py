@@ -1,42 +1,36 @@
 import os
 import json
 import glob
-from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import polars as pl
+
+try:
+    import orjson
+
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
 
 DOC_DIR = r"c:\dev\edinet2dataset\edinet_corpus\annual"
 
 def process_file(jp):
+    # 日付の解釈はここでせず、文字列のまま返す（最後に polars でまとめて変換する）
     try:
-        with open(jp, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        p_start = data.get('periodStart')
-        p_end = data.get('periodEnd')
-        s_date = data.get('submitDateTime')
-        
-        res = {}
-        if p_start:
-            try:
-                res['p_start'] = datetime.strptime(p_start, "%Y-%m-%d").date()
-            except ValueError:
-                pass
-        
-        if p_end:
-            try:
-                res['p_end'] = datetime.strptime(p_end, "%Y-%m-%d").date()
-            except ValueError:
-                pass
-
-        if s_date:
-            try:
-                res['s_date'] = datetime.strptime(s_date, "%Y-%m-%d %H:%M").date()
-            except ValueError:
-                pass
-        return res
+        # バイト列のまま渡す（orjson があれば C でパース。テキストへのデコードも省ける）
+        with open(jp, 'rb') as f:
+            data = _loads(f.read())
+        return data.get('periodStart'), data.get('periodEnd'), data.get('submitDateTime')
     except Exception:
         return None
 
+def to_dates(values, fmt):
+    s = pl.Series(values, dtype=pl.String)
+    # strptime と同じく前後に空白があるものは不正扱い（polars は読み飛ばしてしまう）
+    s = s.filter(s == s.str.strip_chars())
+    return s.str.to_datetime(fmt, strict=False).dt.date()
+
 def main():
     if not os.path.exists(DOC_DIR):
         print(f"Directory not found: {DOC_DIR}")
@@ -50,36 +44,37 @@ def main():
 
     print(f"Found {len(json_files)} JSON files. Scanning dates with parallel workers...")
 
-    min_period_start = None
-    max_period_end = None
-    min_submit_date = None
-    max_submit_date = None
+    p_starts, p_ends, s_dates = [], [], []
 
+    # JSONのパースは GIL を持ったままなのでプロセス並列にし、
+    # ファイルごとに Future を作らないよう chunksize でまとめて渡す（spawn は 10_parse_all_bspl と同じ）
     count = 0
-    with ThreadPoolExecutor(max_workers=16) as executor:
-        futures = [executor.submit(process_file, jp) for jp in json_files]
-        for future in as_completed(futures):
-            res = future.result()
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=ctx) as executor:
+        for res in executor.map(process_file, json_files, chunksize=256):
             if res:
-                if 'p_start' in res:
-                    dt = res['p_start']
-                    if min_period_start is None or dt < min_period_start:
-                        min_period_start = dt
-                if 'p_end' in res:
-                    dt = res['p_end']
-                    if max_period_end is None or dt > max_period_end:
-                        max_period_end = dt
-                if 's_date' in res:
-                    dt = res['s_date']
-                    if min_submit_date is None or dt < min_submit_date:
-                        min_submit_date = dt
-                    if max_submit_date is None or dt > max_submit_date:
-                        max_submit_date = dt
+                p_start, p_end, s_date = res
+                if p_start:
+                    p_starts.append(p_start)
+                if p_end:
+                    p_ends.append(p_end)
+                if s_date:
+                    s_dates.append(s_date)
             
             count += 1
             if count % 2000 == 0:
                 print(f"Processed {count} files...")
 
+    # 日付への変換と min/max は列でまとめて行う（形式が違うものは null になり無視される）
+    p_start_dates = to_dates(p_starts, "%Y-%m-%d")
+    p_end_dates = to_dates(p_ends, "%Y-%m-%d")
+    s_date_dates = to_dates(s_dates, "%Y-%m-%d %H:%M")
+
+    min_period_start = p_start_dates.min()
+    max_period_end = p_end_dates.max()
+    min_submit_date = s_date_dates.min()
+    max_submit_date = s_date_dates.max()
+
     print("-" * 40)
     print(f"Total processed files: {count}")
     print(f"Period Range: {min_period_start} to {max_period_end}")
@@ -1,5 +1,4 @@
 import os
-import glob
 import csv
 from tqdm import tqdm
 
@@ -12,8 +11,8 @@ def main():
         return
 
     # Get list of company directories (E00000...)
-    company_dirs = [d for d in os.listdir(TARGET_DIR) if os.path.isdir(os.path.join(TARGET_DIR, d))]
-    company_dirs.sort()
+    with os.scandir(TARGET_DIR) as it:
+        company_dirs = sorted(e.name for e in it if e.is_dir())
 
     print(f"Found {len(company_dirs)} company directories. Scanning contents...")
 
@@ -22,17 +21,14 @@ def main():
     for company_dir in tqdm(company_dirs):
         full_path = os.path.join(TARGET_DIR, company_dir)
         
-        # Find all .tsv files in the company directory
-        # glob pattern: path/*.tsv
-        tsv_files = glob.glob(os.path.join(full_path, "*.tsv"))
-        
-        # Extract DocIDs from filenames (S100XXXX.tsv -> S100XXXX)
-        doc_ids = [os.path.splitext(os.path.basename(f))[0] for f in tsv_files]
-        doc_ids.sort()
+        # Find all .tsv files in the company directory (one scandir pass, no fnmatch)
+        # and extract DocIDs from filenames (S100XXXX.tsv -> S100XXXX)
+        with os.scandir(full_path) as it:
+            doc_ids = sorted(e.name[:-4] for e in it if e.name.endswith(".tsv") and e.is_file())
 
         results.append({
             "edinet_code": company_dir,
-            "tsv_count": len(tsv_files),
+            "tsv_count": len(doc_ids),
             "doc_ids": ",".join(doc_ids)
         })
 
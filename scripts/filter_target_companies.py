@@ -1,9 +1,15 @@
 import csv
 import os
 import json
-import glob
 from tqdm import tqdm
 
+try:
+    import orjson
+
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
 TOSHO_CSV = r"c:\dev\edinet2dataset\tosho.csv"
 COMPLETE_LIST = r"c:\dev\edinet2dataset\complete_companies.csv"
 OUTPUT_FILE = r"c:\dev\edinet2dataset\target_companies.csv"
@@ -40,14 +46,20 @@ def load_tosho_data():
 def get_sec_code(edinet_code):
     """EDINETコードから証券コードを取得（JSONを読み込む）"""
     company_dir = os.path.join(CORPUS_DIR, edinet_code)
-    json_files = glob.glob(os.path.join(company_dir, "*.json"))
     
-    if not json_files:
+    # 使うのは最初の1つだけなので、全件を列挙せず見つかった時点で止める
+    json_path = None
+    if os.path.isdir(company_dir):
+        with os.scandir(company_dir) as it:
+            json_path = next((e.path for e in it if e.name.endswith(".json") and e.is_file()), None)
+    
+    if json_path is None:
         return None
     
     try:
-        with open(json_files[0], 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        # バイト列のまま渡す（orjson があれば C でパース）
+        with open(json_path, 'rb') as f:
+            data = _loads(f.read())
             sec_code = data.get('secCode')
             if sec_code and len(sec_code) >= 4:
                 return sec_code[:4]
@@ -1,5 +1,4 @@
 import os
-import glob
 import json
 import csv
 from tqdm import tqdm
@@ -12,7 +11,14 @@ THRESHOLD = 10  # 10年分未満を抽出
 def process_company(company_path):
     try:
         edinet_code = os.path.basename(company_path)
-        tsv_files = glob.glob(os.path.join(company_path, "*.tsv"))
+        # TSV と JSON を1回の scandir でまとめて拾う
+        tsv_files, json_files = [], []
+        with os.scandir(company_path) as it:
+            for e in it:
+                if e.name.endswith(".tsv") and e.is_file():
+                    tsv_files.append(e.path)
+                elif e.name.endswith(".json") and e.is_file():
+                    json_files.append(e.path)
         count = len(tsv_files)
         
         # 10年分以上あればスキップ（高速化のため詳細読み込みしない）
@@ -22,7 +28,6 @@ def process_company(company_path):
 
         # 会社名を取得するためにJSONを探す
         company_name = "Unknown"
-        json_files = glob.glob(os.path.join(company_path, "*.json"))
         if json_files:
             # 最新のものを読むためにソートしてもいいが、どれでも会社名は同じはず
             try:
@@ -45,7 +50,8 @@ def main():
         print(f"Directory not found: {TARGET_DIR}")
         return
 
-    company_dirs = [os.path.join(TARGET_DIR, d) for d in os.listdir(TARGET_DIR) if os.path.isdir(os.path.join(TARGET_DIR, d))]
+    with os.scandir(TARGET_DIR) as it:
+        company_dirs = [e.path for e in it if e.is_dir()]
     print(f"Scanning {len(company_dirs)} companies for those with less than {THRESHOLD} years of data...")
 
     incomplete_companies = []
@@ -0,0 +1,51 @@
+"""
+DuckDB を使う処理（11 → 07 → 12 → 15 → 16）を1つの接続でまとめて実行する。
+スクリプトごとに接続を開き直さないので、カタログ読み込みや parquet メタデータの
+キャッシュがステップ間で使い回される。
+
+使い方（例）:
+  python scripts/10_parse_all_bspl.py
+  python scripts/run_pipeline.py
+"""
+
+import os
+import importlib.util
+from pathlib import Path
+
+import duckdb
+
+DB_PATH = "work/olc/olc.duckdb"
+
+STEPS = [
+    "11_rebuild_db_multi",
+    "07_build_mart",
+    "12_mart_by_doc",
+    "15_check_tminus2_values",
+    "16_check_doc_pl_compare",
+]
+
+def load_step(name: str):
+    # ファイル名が数字始まりで import 文が使えないので、パスから読み込む
+    path = Path(__file__).resolve().parent / f"{name}.py"
+    spec = importlib.util.spec_from_file_location(f"step_{name}", path)
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+def main(steps=None):
+    con = duckdb.connect(DB_PATH)
+    con.execute("PRAGMA enable_object_cache")
+    con.execute(f"PRAGMA threads={os.cpu_count()}")
+
+    for name in steps or STEPS:
+        print(f"=== {name}")
+        load_step(name).main(con)
+
+    con.close()
+
+if __name__ == "__main__":
+    import argparse
+    p = argparse.ArgumentParser()
+    p.add_argument("--steps", nargs="+", default=None, choices=STEPS, help="実行するステップ（既定: 全部）")
+    args = p.parse_args()
+    main(args.steps)
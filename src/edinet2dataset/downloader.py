@@ -1,4 +1,5 @@
 import requests
+from requests.adapters import HTTPAdapter
 import datetime
 import shutil
 import os
@@ -53,6 +54,10 @@ class Downloader:
         self.edinet_code_info = self._load_edinet_code_info()
         assert os.environ.get("EDINET_API_KEY") is not None, "EDINET_API_KEY is not set"
         self.edinet_api_key = os.environ.get("EDINET_API_KEY")
+        # reuse keep-alive connections across API calls (sized for a few download threads)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=8)
+        self.session.mount("https://", adapter)
 
     @staticmethod
     def _load_edinet_code_info() -> pl.DataFrame:
@@ -86,11 +91,10 @@ class Downloader:
         day_list.append(end_date)
         return day_list
 
-    @staticmethod
-    def get_response(url: str, date: datetime.date, type: int, key: str) -> dict:
+    def get_response(self, url: str, date: datetime.date, type: int, key: str) -> dict:
         # type: 1:metadata only, 2:metadata and results
         params = {"date": date, "type": type, "Subscription-Key": key}
-        res = requests.get(url, params=params)
+        res = self.session.get(url, params=params)
         return res.json()
 
     def get_edinet_code(self, company_name: str) -> str:
@@ -161,7 +165,7 @@ class Downloader:
         """Retrieve a specific document from EDINET API. type: 2 for PDF"""
         url = "https://disclosure.edinet-fsa.go.jp/api/v2/documents/" + doc_id
         params = {"type": 2, "Subscription-Key": self.edinet_api_key}
-        with requests.get(url, params=params) as res:
+        with self.session.get(url, params=params) as res:
             with open(os.path.join(output_dir, f"{doc_id}.pdf"), "wb") as f:
                 f.write(res.content)
         logger.info(f"Downloaded {doc_id}.pdf to {output_dir}")
@@ -172,7 +176,7 @@ class Downloader:
         params = {"type": 1, "Subscription-Key": self.edinet_api_key}
         # zip download
         try:
-            with requests.get(url, params=params) as res:
+            with self.session.get(url, params=params) as res:
                 with tempfile.TemporaryDirectory() as tmp_dir:
                     with zipfile.ZipFile(io.BytesIO(res.content)) as z:
                         for file in z.namelist():
@@ -193,7 +197,7 @@ class Downloader:
         url = "https://disclosure.edinet-fsa.go.jp/api/v2/documents/" + doc_id
         params = {"type": 5, "Subscription-Key": self.edinet_api_key}
         try:
-            with requests.get(url, params=params) as res:
+            with self.session.get(url, params=params) as res:
                 with tempfile.TemporaryDirectory() as tmp_dir:
                     with zipfile.ZipFile(io.BytesIO(res.content)) as z:
                         for file in z.namelist():
@@ -1,5 +1,7 @@
 import polars as pl
 import argparse
+import json
+import sys
 from edinet2dataset.element_id_table import BS, PL, CF, SUMMARY, META, TEXT
 from dataclasses import dataclass
 from loguru import logger
@@ -28,6 +30,9 @@ YEAR_LIST = [
     "FilingDate",
 ]
 
+# Prefix of the stdout line written by `--emit json`, so callers can skip log output
+JSON_SENTINEL = "###JSON### "
+
 
 class Parser:
     @staticmethod
@@ -107,10 +112,13 @@ def extract_leaf_elements(sheet: dict) -> list:
 
 def parse_tsv(
     file_path,
+    category_list: list[str] | None = None,
 ) -> FinancialData | None:
     """
     Parse the TSV file and return a FinancialData object.
     Current implementation supports only consolidated reports.
+    If category_list is given, only those sheets (plus META) are extracted
+    from the single read of the TSV; the others are left empty.
     """
 
     parser = Parser()
@@ -131,6 +139,13 @@ def parse_tsv(
         "CF": CF,
     }
     for sheet_name, sheet in sheet_name_map.items():
+        if (
+            category_list is not None
+            and sheet_name != "META"
+            and sheet_name not in category_list
+        ):
+            financial_data[sheet_name] = {}
+            continue
         if sheet_name == "META":
             contain_year = False
         else:
@@ -177,13 +192,30 @@ def parse_args():
             "TEXT",
         ],
     )
+    parser.add_argument(
+        "--emit",
+        type=str,
+        default="repr",
+        help="Output format. json writes a single sentinel-tagged line {category: data}",
+        choices=["repr", "json"],
+    )
     return parser.parse_args()
 
 
 if __name__ == "__main__":
     args = parse_args()
 
-    financial_data = parse_tsv(args.file_path)
+    financial_data = parse_tsv(args.file_path, args.category_list)
+    if financial_data is None:
+        logger.error(f"No consolidated financial data in {args.file_path}")
+        sys.exit(1)
+    if args.emit == "json":
+        data = {
+            category: getattr(financial_data, category.lower())
+            for category in args.category_list
+        }
+        print(JSON_SENTINEL + json.dumps(data, ensure_ascii=False))
+        sys.exit(0)
     for category in args.category_list:
         if category == "META":
             print(financial_data.meta)